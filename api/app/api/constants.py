@@ -1,8 +1,9 @@
 from fastapi import Depends
-from .dependencies import authentication, validate_request_body, validate_user_access
+from .dependencies import authentication, rate_limit, validate_request_body, validate_user_access
 
 DEPENDENCIES = [
     Depends(authentication),
     Depends(validate_user_access),
+    Depends(rate_limit),
     Depends(validate_request_body)
 ]
\ No newline at end of file
@@ -3,6 +3,8 @@ from fastapi import Request, HTTPException
 from typing import Optional
 from ..core import UserManager
 from ..providers import Model
+from ..rate_limits import usage_rate_limiter
+from .exceptions import UsageRateLimitError
 
 class AuthenticationHandler:
     user_manager = UserManager()
@@ -115,12 +117,7 @@ class RequestValidator:
                 status_code=400
             )
         
-        is_endpoint_mismatch = (
-            (isinstance(model_instance.endpoint, str) and model_instance.endpoint != endpoint) or
-            (not isinstance(model_instance.endpoint, str) and endpoint not in model_instance.endpoint)
-        )
-
-        if is_endpoint_mismatch:
+        if endpoint not in model_instance.endpoints:
             raise HTTPException(
                 status_code=400,
                 detail=(
@@ -170,6 +167,17 @@ async def validate_user_access(request: Request) -> None:
     await UserAccessHandler._check_premium_status(user)
     await UserAccessHandler._validate_ip(request, user)
 
+async def rate_limit(request: Request) -> None:
+    retry_after = await usage_rate_limiter.hit_request(request.state.user)
+
+    if retry_after is not None:
+        error = UsageRateLimitError(retry_after, 'requests')
+        raise HTTPException(
+            status_code=error.status_code,
+            detail=error.message,
+            headers=error.headers
+        )
+
 async def validate_request_body(request: Request) -> None:
     body = await RequestValidator._get_request_body(request)
     
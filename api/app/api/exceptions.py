@@ -8,6 +8,16 @@ class InsufficientCreditsError(Exception):
         )
         super().__init__(self.message)
 
+class UsageRateLimitError(Exception):
+    def __init__(self, retry_after: int, limit_type: str):
+        self.status_code = 429
+        self.headers = {'Retry-After': str(retry_after)}
+        self.message = (
+            f'Rate limit exceeded: your tier\'s {limit_type} budget is used up. '
+            f'Please retry in {retry_after} seconds, or upgrade your subscription tier for higher limits.'
+        )
+        super().__init__(self.message)
+
 class NoProviderAvailableError(Exception):
     def __init__(self):
         self.status_code = 503
@@ -40,9 +40,6 @@ async def audio_speech(
     data: SpeechRequest
 ) -> Response:
     try:
-        provider = await AudioHandler._get_provider(data.model)
-        provider_instance = BaseProvider.get_provider_class(provider['name'])
-        
         token_count = AudioHandler._get_token_count(
             data.model
         )
@@ -52,6 +49,9 @@ async def audio_speech(
             required_tokens=token_count
         )
 
+        provider = await AudioHandler._get_provider(data.model)
+        provider_instance = BaseProvider.get_provider_class(provider['name'])
+
         request.state.provider = provider
         request.state.provider_name = provider['name']
 
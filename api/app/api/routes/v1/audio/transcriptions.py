@@ -10,7 +10,7 @@ from fastapi import (
 )
 from ....constants import DEPENDENCIES
 from .....core import ProviderManager
-from .....providers import Model, BaseProvider
+from .....providers import Model, ModelRegistry, BaseProvider
 from ....exceptions import InsufficientCreditsError, NoProviderAvailableError
 
 router = APIRouter()
@@ -48,9 +48,8 @@ async def audio_transcriptions(
     file: UploadFile = File(...)
 ) -> Response:
     try:
-        provider = await AudioHandler._get_provider(model)
-        provider_instance = BaseProvider.get_provider_class(provider['name'])
-        
+        model = ModelRegistry.resolve(model) or model
+
         token_count = AudioHandler._get_token_count(
             model=model
         )
@@ -60,6 +59,9 @@ async def audio_transcriptions(
             required_tokens=token_count
         )
 
+        provider = await AudioHandler._get_provider(model)
+        provider_instance = BaseProvider.get_provider_class(provider['name'])
+
         request.state.provider = provider
         request.state.provider_name = provider['name']
 
@@ -5,17 +5,18 @@ from typing import Union, Dict, List, Any
 from .....responses import PrettyJSONResponse
 from ....constants import DEPENDENCIES
 from .....models import ChatRequest, Message
-from .....utils import RequestProcessor
-from .....core import ProviderManager
-from .....providers import BaseProvider
-from ....exceptions import InsufficientCreditsError, NoProviderAvailableError
+from .....utils import request_processor
+from .....rate_limits import usage_rate_limiter
+from .....core import ProviderManager, UserManager
+from .....providers import BaseProvider, Model
+from .....providers.utils import ErrorHandler
+from ....exceptions import InsufficientCreditsError, NoProviderAvailableError, UsageRateLimitError
 
 router = APIRouter()
 
-request_processor = RequestProcessor()
-
 class ChatCompletionsHandler:
     provider_manager = ProviderManager()
+    user_manager = UserManager()
 
     @staticmethod
     def _has_vision_requirement(messages: List[Message]) -> bool:
@@ -33,6 +34,30 @@ class ChatCompletionsHandler:
                 required_tokens=required_tokens
             )
 
+    @classmethod
+    async def _reserve_credits(
+        cls,
+        user: Dict[str, Any],
+        model: str,
+        token_count: int
+    ) -> float:
+        model_instance = Model.get_model(model)
+        amount = token_count * (model_instance.pricing.multiplier if model_instance else 1)
+
+        if not await cls.user_manager.reserve_credits(user['user_id'], amount):
+            raise InsufficientCreditsError(
+                available_credits=user['credits'],
+                required_tokens=token_count
+            )
+
+        user['credits'] -= amount
+        return amount
+
+    @classmethod
+    async def _refund_credits(cls, user: Dict[str, Any], amount: float) -> None:
+        await cls.user_manager.reconcile_credits(user['user_id'], amount, 0)
+        user['credits'] += amount
+
     @classmethod
     async def _get_provider(
         cls,
@@ -62,7 +87,7 @@ async def chat_completions(
     data: ChatRequest
 ) -> Union[PrettyJSONResponse, StreamingResponse]:
     try:
-        token_count = request_processor.count_tokens(data)
+        token_count = await request_processor.count_tokens_async(data)
         
         ChatCompletionsHandler._validate_credits(
             available_credits=request.state.user['credits'],
@@ -70,49 +95,68 @@ async def chat_completions(
         )
         request.state.token_count = token_count
 
-        if data.provider_name and request.state.user.get('premium_tier', 0) == 5:
-            provider = await ChatCompletionsHandler._get_provider(
-                model=data.model,
-                name=data.provider_name
-            )
-        else:
-            vision_required = ChatCompletionsHandler._has_vision_requirement(data.messages)
-            provider = await ChatCompletionsHandler._get_provider(
-                model=data.model,
-                vision_required=vision_required,
-                tools_required=data.tools
-            )
+        retry_after = await usage_rate_limiter.hit_tokens(request.state.user, token_count)
+        if retry_after is not None:
+            raise UsageRateLimitError(retry_after, 'tokens')
+
+        reserved = await ChatCompletionsHandler._reserve_credits(
+            request.state.user,
+            data.model,
+            token_count
+        )
+
+        try:
+            if data.provider_name and request.state.user.get('premium_tier', 0) == 5:
+                provider = await ChatCompletionsHandler._get_provider(
+                    model=data.model,
+                    name=data.provider_name
+                )
+            else:
+                vision_required = ChatCompletionsHandler._has_vision_requirement(data.messages)
+                provider = await ChatCompletionsHandler._get_provider(
+                    model=data.model,
+                    vision_required=vision_required,
+                    tools_required=data.tools
+                )
         
-        request.state.provider = provider
-        request.state.provider_name = provider['name']
+            request.state.provider = provider
+            request.state.provider_name = provider['name']
 
-        provider_instance = BaseProvider.get_provider_class(provider['name'])
+            provider_instance = BaseProvider.get_provider_class(provider['name'])
 
-        if not provider_instance:
-            raise HTTPException(
-                status_code=500,
-                detail=(
-                    'Something went wrong when getting the provider class, '
-                    'which turned out to be null. Please try again later.'
+            if not provider_instance:
+                raise HTTPException(
+                    status_code=500,
+                    detail=(
+                        'Something went wrong when getting the provider class, '
+                        'which turned out to be null. Please try again later.'
+                    )
                 )
-            )
 
-        response = await provider_instance.chat_completions(
-            request,
-            **data.model_dump(
-                mode='json',
-                exclude_none=True,
-                exclude={'provider_name'}
+            response = await provider_instance.chat_completions(
+                request,
+                **data.model_dump(
+                    mode='json',
+                    exclude_none=True,
+                    exclude={'provider_name'}
+                )
             )
-        )
 
-        if response.status_code == 503:
-            print(f'{data.model}: No sub-provider available ({provider["name"]})')
+            if response.status_code == 503:
+                print(f'{data.model}: No sub-provider available ({provider["name"]})')
+        except BaseException:
+            await ChatCompletionsHandler._refund_credits(request.state.user, reserved)
+            raise
+
+        if not await ErrorHandler._is_successful(response):
+            await ChatCompletionsHandler._refund_credits(request.state.user, reserved)
 
         return response
-        
+
     except (InsufficientCreditsError, NoProviderAvailableError) as e:
         raise HTTPException(status_code=e.status_code, detail=str(e))
+    except UsageRateLimitError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers=e.headers)
     except HTTPException:
         raise
     except Exception:
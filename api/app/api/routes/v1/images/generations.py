@@ -41,9 +41,6 @@ async def images_generations(
     data: ImageRequest
 ) -> PrettyJSONResponse:
     try:
-        provider = await ImageGenerationHandler._get_provider(data.model)
-        provider_instance = BaseProvider.get_provider_class(provider['name'])
-        
         token_count = ImageGenerationHandler._get_token_count(
             data.model
         )
@@ -53,6 +50,9 @@ async def images_generations(
             required_tokens=token_count
         )
 
+        provider = await ImageGenerationHandler._get_provider(data.model)
+        provider_instance = BaseProvider.get_provider_class(provider['name'])
+
         request.state.provider = provider
         request.state.provider_name = provider['name']
 
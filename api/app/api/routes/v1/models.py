@@ -1,14 +1,94 @@
-from fastapi import APIRouter
-from typing import Dict, Any
-from ....providers import Model
-from ....responses import PrettyJSONResponse
+import hashlib
+from fastapi import APIRouter, Request, Response
+from typing import Dict, Tuple, Optional, Set
+from ....providers import ModelRegistry
+from ....responses import PrettyJSONResponse, pretty_json
 
 router = APIRouter()
 
+class ModelsCatalog:
+    cache_control: str = 'public, max-age=300'
+    views: Dict[Tuple[Optional[str], Optional[str], bool], Tuple[bytes, str]] = {}
+    owners: Optional[Set[str]] = None
+
+    @classmethod
+    def _get_owners(cls) -> Set[str]:
+        if cls.owners is None:
+            cls.owners = {model.owned_by for model in ModelRegistry.models.values()}
+        return cls.owners
+
+    @classmethod
+    def _normalize_filters(
+        cls,
+        endpoint: Optional[str],
+        owned_by: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if endpoint is not None and endpoint not in ModelRegistry.endpoint_models:
+            return '', ''
+        if owned_by is not None and owned_by not in cls._get_owners():
+            return '', ''
+        return endpoint, owned_by
+
+    @staticmethod
+    def _render(endpoint: Optional[str], owned_by: Optional[str]) -> bytes:
+        models = (
+            ModelRegistry.get_by_endpoint(endpoint)
+            if endpoint is not None
+            else ModelRegistry.models.values()
+        )
+
+        return PrettyJSONResponse.encode({
+            'an_easier_overview_available_here': 'https://docs.zukijourney.com/models',
+            'object': 'list',
+            'data': [
+                model.to_json() for model in models
+                if owned_by is None or model.owned_by == owned_by
+            ]
+        })
+
+    @classmethod
+    def get_view(
+        cls,
+        endpoint: Optional[str] = None,
+        owned_by: Optional[str] = None
+    ) -> Tuple[bytes, str]:
+        endpoint, owned_by = cls._normalize_filters(endpoint, owned_by)
+        key = (endpoint, owned_by, pretty_json.get())
+        view = cls.views.get(key)
+
+        if view is None:
+            body = cls._render(endpoint, owned_by)
+            view = cls.views[key] = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+        return view
+
+    @staticmethod
+    def is_not_modified(request: Request, etag: str) -> bool:
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag in tags
+
 @router.get('', response_class=PrettyJSONResponse)
-async def models() -> Dict[str, Any]:
-    return {
-        'an_easier_overview_available_here': 'https://docs.zukijourney.com/models',
-        'object': 'list',
-        'data': Model.all_to_json()
-    }
\ No newline at end of file
+async def models(
+    request: Request,
+    endpoint: Optional[str] = None,
+    owned_by: Optional[str] = None
+) -> Response:
+    body, etag = ModelsCatalog.get_view(endpoint, owned_by)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': ModelsCatalog.cache_control,
+        'Vary': 'Accept'
+    }
+
+    if ModelsCatalog.is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=body,
+        media_type=PrettyJSONResponse.media_type,
+        headers=headers
+    )
@@ -41,9 +41,6 @@ async def moderations(
     data: ModerationRequest
 ) -> PrettyJSONResponse:
     try:
-        provider = await ModerationHandler._get_provider(data.model)
-        provider_instance = BaseProvider.get_provider_class(provider['name'])
-        
         token_count = ModerationHandler._get_token_count(
             data.model
         )
@@ -53,6 +50,9 @@ async def moderations(
             required_tokens=token_count
         )
 
+        provider = await ModerationHandler._get_provider(data.model)
+        provider_instance = BaseProvider.get_provider_class(provider['name'])
+
         request.state.provider = provider
         request.state.provider_name = provider['name']
 
@@ -1,10 +1,12 @@
-from .db import UserManager, ProviderManager
+from .db import DatabaseClient, UserManager, ProviderManager, SubProviderManager
 from .config import Settings
 
 settings = Settings()
 
 __all__ = [
+    'DatabaseClient',
     'UserManager',
     'ProviderManager',
+    'SubProviderManager',
     'settings'
 ]
\ No newline at end of file
@@ -0,0 +1,176 @@
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Deque, Hashable, Optional, Tuple
+
+class CircuitState(str, Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+@dataclass
+class CircuitBreakerConfig:
+    window_seconds: float = 60.0
+    min_requests: int = 10
+    failure_rate_threshold: float = 0.5
+    slow_call_threshold: float = 10.0
+    slow_call_rate_threshold: float = 0.8
+    base_cooldown: float = 5.0
+    max_cooldown: float = 300.0
+    half_open_max_calls: int = 1
+    probe_timeout: float = 30.0
+    ignored_statuses: Tuple[int, ...] = (400, 404, 413, 422)
+
+class CircuitBreaker:
+    def __init__(self, config: CircuitBreakerConfig):
+        self.config = config
+        self.state = CircuitState.CLOSED
+        self.events: Deque[Tuple[float, bool, bool]] = deque()
+        self.trip_count = 0
+        self.retry_at = 0.0
+        self.probe_calls = 0
+        self.probe_started_at = 0.0
+        self.generation = 0
+
+    def is_available(self, now: float) -> bool:
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            return now >= self.retry_at
+
+        return (
+            self.probe_calls < self.config.half_open_max_calls or
+            now - self.probe_started_at >= self.config.probe_timeout
+        )
+
+    def try_acquire(self, now: float) -> Optional[int]:
+        if self.state == CircuitState.OPEN:
+            if now < self.retry_at:
+                return None
+            self._set_state(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self.probe_calls >= self.config.half_open_max_calls:
+                if now - self.probe_started_at < self.config.probe_timeout:
+                    return None
+                self.probe_calls = 0
+
+            self.probe_calls += 1
+            self.probe_started_at = now
+
+        return self.generation
+
+    def record(
+        self,
+        now: float,
+        generation: Optional[int],
+        failed: bool,
+        latency: Optional[float] = None
+    ) -> None:
+        if generation != self.generation:
+            return
+
+        slow = latency is not None and latency >= self.config.slow_call_threshold
+
+        if self.state == CircuitState.HALF_OPEN:
+            if failed or slow:
+                self._trip(now)
+            else:
+                self._close()
+            return
+
+        if self.state == CircuitState.OPEN:
+            return
+
+        self.events.append((now, failed, slow))
+        self._evaluate(now)
+
+    def _evaluate(self, now: float) -> None:
+        oldest = now - self.config.window_seconds
+        while self.events and self.events[0][0] < oldest:
+            self.events.popleft()
+
+        total = len(self.events)
+        if total < self.config.min_requests:
+            return
+
+        failures = sum(1 for _, failed, _ in self.events if failed)
+        slow_calls = sum(1 for _, _, slow in self.events if slow)
+
+        if (
+            failures / total >= self.config.failure_rate_threshold or
+            slow_calls / total >= self.config.slow_call_rate_threshold
+        ):
+            self._trip(now)
+
+    def _set_state(self, state: CircuitState) -> None:
+        self.state = state
+        self.generation += 1
+        self.probe_calls = 0
+        self.events.clear()
+
+    def _trip(self, now: float) -> None:
+        self.trip_count += 1
+        cooldown = min(
+            self.config.max_cooldown,
+            self.config.base_cooldown * 2 ** (self.trip_count - 1)
+        )
+        self.retry_at = now + cooldown
+        self._set_state(CircuitState.OPEN)
+
+    def _close(self) -> None:
+        self.trip_count = 0
+        self._set_state(CircuitState.CLOSED)
+
+class CircuitBreakerRegistry:
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        self.config = config or CircuitBreakerConfig()
+        self.breakers: Dict[Hashable, CircuitBreaker] = {}
+        self.tickets: ContextVar[Optional[Dict[Hashable, int]]] = ContextVar(
+            'circuit_tickets',
+            default=None
+        )
+
+    def _get(self, key: Hashable) -> CircuitBreaker:
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(self.config)
+        return breaker
+
+    def _get_generation(self, key: Hashable, breaker: CircuitBreaker) -> Optional[int]:
+        tickets = self.tickets.get() or {}
+        if key in tickets:
+            return tickets[key]
+        return breaker.generation if breaker.state == CircuitState.CLOSED else None
+
+    def is_available(self, key: Hashable) -> bool:
+        breaker = self.breakers.get(key)
+        return breaker is None or breaker.is_available(time.monotonic())
+
+    def try_acquire(self, key: Hashable) -> bool:
+        generation = self._get(key).try_acquire(time.monotonic())
+        if generation is None:
+            return False
+
+        tickets = dict(self.tickets.get() or {})
+        tickets[key] = generation
+        self.tickets.set(tickets)
+        return True
+
+    def record_success(self, key: Hashable, latency: Optional[float] = None) -> None:
+        breaker = self._get(key)
+        breaker.record(time.monotonic(), self._get_generation(key, breaker), False, latency)
+
+    def record_failure(self, key: Hashable, status_code: Optional[int] = None) -> None:
+        if status_code in self.config.ignored_statuses:
+            return
+
+        breaker = self._get(key)
+        breaker.record(time.monotonic(), self._get_generation(key, breaker), True)
+
+    def get_state(self, key: Hashable) -> CircuitState:
+        breaker = self.breakers.get(key)
+        return breaker.state if breaker else CircuitState.CLOSED
@@ -1,11 +1,23 @@
+from typing import Optional, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     db_url: str
     webhook_url: str
+    db_max_pool_size: int = 100
+    db_min_pool_size: int = 0
+    db_max_idle_time_ms: Optional[int] = None
+    user_cache_ttl: float = 30
+    user_cache_size: int = 10000
+    pretty_json: bool = True
+    tiktoken_cache_dir: Optional[str] = '~/.cache/tiktoken'
+    tiktoken_encodings: List[str] = ['o200k_base', 'cl100k_base']
+    hedged_requests: bool = False
+    rate_limit_storage_uri: str = 'memory://'
+    rate_limit_strategy: str = 'moving-window'
 
     model_config = SettingsConfigDict(
         env_file='.env',
         env_ignore_empty=True,
         extra='ignore'
-    )
\ No newline at end of file
+    )
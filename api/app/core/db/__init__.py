@@ -1,3 +1,4 @@
-from .managers import UserManager, ProviderManager
+from .client import DatabaseClient
+from .managers import UserManager, ProviderManager, SubProviderManager
 
-__all__ = ['UserManager', 'ProviderManager']
\ No newline at end of file
+__all__ = ['DatabaseClient', 'UserManager', 'ProviderManager', 'SubProviderManager']
\ No newline at end of file
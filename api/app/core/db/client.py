@@ -0,0 +1,38 @@
+from typing import ClassVar, Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from ..config import Settings
+
+settings = Settings()
+
+class DatabaseClient:
+    client: ClassVar[Optional[AsyncIOMotorClient]] = None
+    database_name: ClassVar[str] = 'db'
+
+    @classmethod
+    def connect(cls) -> AsyncIOMotorClient:
+        if cls.client is None:
+            cls.client = AsyncIOMotorClient(
+                settings.db_url,
+                maxPoolSize=settings.db_max_pool_size,
+                minPoolSize=settings.db_min_pool_size,
+                maxIdleTimeMS=settings.db_max_idle_time_ms
+            )
+        return cls.client
+
+    @classmethod
+    def get_client(cls) -> AsyncIOMotorClient:
+        return cls.client or cls.connect()
+
+    @classmethod
+    def get_collection(cls, name: str) -> AsyncIOMotorCollection:
+        return cls.get_client()[cls.database_name][name]
+
+    @staticmethod
+    def encode_field(name: str) -> str:
+        return name.replace('$', '\uff04').replace('.', '\uff0e')
+
+    @classmethod
+    def close(cls) -> None:
+        if cls.client is not None:
+            cls.client.close()
+            cls.client = None
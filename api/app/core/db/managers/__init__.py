@@ -1,4 +1,5 @@
 from .user_manager import UserManager
 from .provider_manager import ProviderManager
+from .sub_provider_manager import SubProviderManager
 
-__all__ = ['UserManager', 'ProviderManager']
\ No newline at end of file
+__all__ = ['UserManager', 'ProviderManager', 'SubProviderManager']
\ No newline at end of file
@@ -1,45 +1,229 @@
+import asyncio
 import random
-from datetime import datetime, timedelta
-from motor.motor_asyncio import AsyncIOMotorClient
+import time
+from dataclasses import dataclass
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from typing import Dict, Any, Optional, List, Tuple
-from ...config import Settings
-
-settings = Settings()
+from ..client import DatabaseClient
+from ...circuit_breaker import CircuitBreakerConfig, CircuitBreakerRegistry
 
 class ProviderDatabase:
-    def __init__(self):
-        self.client = AsyncIOMotorClient(settings.db_url)
-        self.collection = self.client['db']['providers']
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return DatabaseClient.get_collection('providers')
+
+@dataclass
+class ProviderMetricsConfig:
+    flush_interval: float = 5.0
+    max_queue_size: int = 100000
+    bucket_seconds: int = 300
+    bucket_count: int = 288
+
+    def get_bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+@dataclass
+class ProviderMetricsEvent:
+    provider_name: str
+    model: str
+    latency: Optional[float] = None
+    failed: bool = False
+
+@dataclass
+class ProviderMetricsCounter:
+    count: int = 0
+    failures: int = 0
+    latency_sum: float = 0
+    latency_count: int = 0
+
+class ProviderMetricsAggregator:
+    def __init__(self, config: Optional[ProviderMetricsConfig] = None):
+        self.config = config or ProviderMetricsConfig()
+        self.db = ProviderDatabase()
+        self.queue: asyncio.Queue[ProviderMetricsEvent] = asyncio.Queue(
+            maxsize=self.config.max_queue_size
+        )
+        self.counters: Dict[Tuple[str, str], ProviderMetricsCounter] = {}
+        self.dropped_events = 0
+
+    def record(
+        self,
+        provider_name: str,
+        model: str,
+        latency: Optional[float] = None,
+        failed: bool = False
+    ) -> None:
+        try:
+            self.queue.put_nowait(ProviderMetricsEvent(
+                provider_name=provider_name,
+                model=model,
+                latency=latency,
+                failed=failed
+            ))
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+
+    def _fold_pending_events(self) -> None:
+        while not self.queue.empty():
+            event = self.queue.get_nowait()
+            counter = self.counters.setdefault(
+                (event.provider_name, event.model),
+                ProviderMetricsCounter()
+            )
+            counter.count += 1
+            counter.failures += int(event.failed)
+
+            if event.latency is not None:
+                counter.latency_sum += event.latency
+                counter.latency_count += 1
+
+    def _restore_counters(
+        self,
+        counters: List[Tuple[Tuple[str, str], ProviderMetricsCounter]]
+    ) -> None:
+        for key, counter in counters:
+            current = self.counters.setdefault(key, ProviderMetricsCounter())
+            current.count += counter.count
+            current.failures += counter.failures
+            current.latency_sum += counter.latency_sum
+            current.latency_count += counter.latency_count
+
+    def _create_update(
+        self,
+        provider_name: str,
+        model: str,
+        counter: ProviderMetricsCounter,
+        bucket: int
+    ) -> UpdateOne:
+        model_field = DatabaseClient.encode_field(model)
+        bucket_path = f'usage_buckets.{model_field}.{bucket}'
+        update = {
+            '$inc': {
+                f'usage.{model_field}': counter.count,
+                f'failures.{model_field}': counter.failures,
+                f'{bucket_path}.count': counter.count,
+                f'{bucket_path}.failures': counter.failures,
+                f'{bucket_path}.latency_sum': counter.latency_sum,
+                f'{bucket_path}.latency_count': counter.latency_count
+            }
+        }
+
+        if counter.latency_count:
+            update['$set'] = {
+                f'latency.{model_field}': counter.latency_sum / counter.latency_count
+            }
+
+        return UpdateOne({'name': provider_name}, update)
+
+    async def flush(self) -> None:
+        self._fold_pending_events()
+
+        if self.dropped_events:
+            print(f'Provider metrics queue was full, dropped {self.dropped_events} events')
+            self.dropped_events = 0
+
+        if not self.counters:
+            return
+
+        counters, self.counters = list(self.counters.items()), {}
+        bucket = self.config.get_bucket(time.time())
+
+        try:
+            await self.db.collection.bulk_write(
+                [
+                    self._create_update(provider_name, model, counter, bucket)
+                    for (provider_name, model), counter in counters
+                ],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            self._restore_counters([counters[index] for index in sorted(failed)])
+            print(f'Failed to flush {len(failed)} provider metrics updates: {str(e)}')
+        except Exception as e:
+            self._restore_counters(counters)
+            print(f'Failed to flush provider metrics: {str(e)}')
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.flush_interval)
+            await self.flush()
+
+@dataclass
+class ProviderRoutingConfig:
+    refresh_interval: float = 10.0
+
+class ProviderRoutingTable:
+    def __init__(self, config: Optional[ProviderRoutingConfig] = None):
+        self.config = config or ProviderRoutingConfig()
+        self.routes: Dict[str, List[Tuple[Dict[str, Any], float]]] = {}
+        self.providers: Dict[str, Dict[str, Any]] = {}
+        self.refreshed_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def replace(
+        self,
+        routes: Dict[str, List[Tuple[Dict[str, Any], float]]],
+        providers: Dict[str, Dict[str, Any]]
+    ) -> None:
+        self.routes = routes
+        self.providers = providers
+        self.refreshed_at = time.monotonic()
 
 class ProviderManager:
+    metrics = ProviderMetricsAggregator()
+    routing = ProviderRoutingTable()
+    circuits = CircuitBreakerRegistry(
+        CircuitBreakerConfig(ignored_statuses=(400, 401, 403, 404, 413, 422, 429))
+    )
+
     def __init__(self):
         self.db = ProviderDatabase()
-        self.window_size = timedelta(hours=24)
         self.max_usage_ratio = 1
 
-    def _calculate_health_score(
+    def _summarize_usage(
         self,
         provider: Dict[str, Any],
         model: str,
-        current_time: datetime,
+        current_bucket: int
+    ) -> ProviderMetricsCounter:
+        oldest_bucket = current_bucket - self.metrics.config.bucket_count
+        summary = ProviderMetricsCounter()
+
+        model_buckets = provider.get('usage_buckets', {}).get(
+            DatabaseClient.encode_field(model), {}
+        )
+
+        for bucket, stats in model_buckets.items():
+            if int(bucket) <= oldest_bucket:
+                continue
+
+            summary.count += stats.get('count', 0)
+            summary.failures += stats.get('failures', 0)
+            summary.latency_sum += stats.get('latency_sum', 0)
+            summary.latency_count += stats.get('latency_count', 0)
+
+        return summary
+
+    def _calculate_health_score(
+        self,
+        usage: ProviderMetricsCounter,
         total_requests: int
     ) -> float:
-        recent_usage = provider.get('usage_history', {}).get(model, [])
-        recent_usage = [
-            u for u in recent_usage 
-            if u['timestamp'] >= current_time - self.window_size
-        ]
-        
-        if not recent_usage:
+        if not usage.count:
             return 0.8
-            
-        provider_requests = sum(u['count'] for u in recent_usage)
-        provider_failures = sum(u['failures'] for u in recent_usage)
-        avg_latency = sum(u['latency'] * u['count'] for u in recent_usage) / provider_requests
-        
-        reliability = 1.0 if provider_requests == 0 else (provider_requests - provider_failures) / provider_requests
+
+        avg_latency = usage.latency_sum / max(1, usage.latency_count)
+
+        reliability = (usage.count - usage.failures) / usage.count
         latency_score = max(0, 1 - (avg_latency / 2000))
-        usage_ratio = provider_requests / max(1, total_requests)
+        usage_ratio = usage.count / max(1, total_requests)
         
         usage_penalty = max(0, 1 - (usage_ratio / self.max_usage_ratio))
         
@@ -91,13 +275,107 @@ class ProviderManager:
                 
         return providers[-1][0]
 
+    def _score_providers(
+        self,
+        providers: List[Dict[str, Any]],
+        model: str,
+        current_bucket: int
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        usages = [
+            self._summarize_usage(provider, model, current_bucket)
+            for provider in providers
+        ]
+        total_requests = sum(usage.count for usage in usages)
+
+        return [
+            (provider, self._calculate_health_score(usage, total_requests))
+            for provider, usage in zip(providers, usages)
+        ]
+
+    def _create_prune_update(
+        self,
+        provider: Dict[str, Any],
+        current_bucket: int
+    ) -> Optional[UpdateOne]:
+        oldest_bucket = current_bucket - self.metrics.config.bucket_count
+        stale_fields = {
+            f'usage_buckets.{model_field}.{bucket}': ''
+            for model_field, buckets in provider.get('usage_buckets', {}).items()
+            for bucket in buckets
+            if int(bucket) <= oldest_bucket
+        }
+
+        if 'usage_history' in provider:
+            stale_fields['usage_history'] = ''
+
+        if not stale_fields:
+            return None
+
+        return UpdateOne({'name': provider['name']}, {'$unset': stale_fields})
+
+    async def _prune_usage_buckets(
+        self,
+        providers: List[Dict[str, Any]],
+        current_bucket: int
+    ) -> None:
+        updates = [
+            update
+            for provider in providers
+            if (update := self._create_prune_update(provider, current_bucket))
+        ]
+
+        if updates:
+            await self.db.collection.bulk_write(updates, ordered=False)
+
+    @staticmethod
+    def _strip_usage_stats(provider: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            k: v for k, v in provider.items()
+            if k not in ['usage_buckets', 'usage_history']
+        }
+
+    async def refresh_routing_table(self) -> None:
+        current_bucket = self.metrics.config.get_bucket(time.time())
+        providers = await self.db.collection.find({}).to_list(length=None)
+
+        providers_by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for provider in providers:
+            for model in provider.get('models', []):
+                providers_by_model.setdefault(model, []).append(provider)
+
+        routes = {
+            model: [
+                (self._strip_usage_stats(provider), score)
+                for provider, score in self._score_providers(model_providers, model, current_bucket)
+            ]
+            for model, model_providers in providers_by_model.items()
+        }
+
+        self.routing.replace(
+            routes=routes,
+            providers={
+                provider['name']: self._strip_usage_stats(provider)
+                for provider in providers
+            }
+        )
+
+        await self._prune_usage_buckets(providers, current_bucket)
+
+    async def _ensure_routing_table(self) -> None:
+        if self.routing.is_loaded:
+            return
+
+        async with self.routing.lock:
+            if not self.routing.is_loaded:
+                await self.refresh_routing_table()
+
     async def get_specific_provider(
         self,
         name: str
     ) -> Optional[Dict[str, Any]]:
-        return await self.db.collection.find_one({
-            'name': name
-        })
+        await self._ensure_routing_table()
+        provider = self.routing.providers.get(name)
+        return provider.copy() if provider else None
 
     async def get_best_provider(
         self,
@@ -106,85 +384,53 @@ class ProviderManager:
         tools: bool = False,
         excluded_providers: List[str] = []
     ) -> Optional[Dict[str, Any]]:
-        current_time = datetime.utcnow()
-        
-        providers = await self.db.collection.find({
-            'models': {'$in': [model]}
-        }).to_list(length=None)
+        await self._ensure_routing_table()
 
-        if not providers:
+        routes = self.routing.routes.get(model)
+        if not routes:
             return None
 
-        filtered_providers = self._filter_providers(
-            providers,
-            vision=vision,
-            tools=tools,
-            excluded_providers=excluded_providers
-        )
+        allowed_names = {
+            provider['name']
+            for provider in self._filter_providers(
+                [provider for provider, _ in routes],
+                vision=vision,
+                tools=tools,
+                excluded_providers=excluded_providers
+            )
+        }
+
+        provider_scores = [
+            (provider, score)
+            for provider, score in routes
+            if provider['name'] in allowed_names and
+            self.circuits.is_available((provider['name'], model))
+        ]
 
-        if not filtered_providers:
+        if not provider_scores:
             return None
 
-        total_requests = 0
-        for provider in filtered_providers:
-            recent_usage = provider.get('usage_history', {}).get(model, [])
-            recent_usage = [
-                u for u in recent_usage 
-                if u['timestamp'] >= current_time - self.window_size
-            ]
-            total_requests += sum(u['count'] for u in recent_usage)
+        provider = self._select_provider_weighted(provider_scores)
+        if not self.circuits.try_acquire((provider['name'], model)):
+            return None
 
-        provider_scores = [
-            (provider, self._calculate_health_score(
-                provider, 
-                model, 
-                current_time,
-                total_requests
-            ))
-            for provider in filtered_providers
-        ]
-        
-        return self._select_provider_weighted(provider_scores)
+        return provider.copy()
 
-    async def update_provider(
+    def record_request(
         self,
         provider_name: str,
-        new_data: Dict[str, Any],
-        model: str = None
+        model: str,
+        latency: Optional[float] = None,
+        failed: bool = False,
+        status_code: Optional[int] = None,
+        response_time: Optional[float] = None
     ) -> None:
-        if model and ('usage' in new_data or 'failures' in new_data or 'latency' in new_data):
-            history_entry = {
-                'timestamp': datetime.utcnow(),
-                'count': new_data.get('usage', {}).get(model, 0),
-                'failures': new_data.get('failures', {}).get(model, 0),
-                'latency': new_data.get('latency', {}).get(model, 0)
-            }
-            
-            provider = await self.get_specific_provider(provider_name)
-            
-            if not provider:
-                update_data = {k: v for k, v in new_data.items() if k != '_id'}
-                update_data['usage_history'] = {model: [history_entry]}
-                await self.db.collection.update_one(
-                    filter={'name': provider_name},
-                    update={'$set': update_data}
-                )
-            else:
-                usage_history = provider.get('usage_history', {})
-                model_history = usage_history.get(model, [])
-                model_history.insert(0, history_entry)
-                usage_history[model] = model_history[:1000]
-                
-                update_data = {k: v for k, v in new_data.items() if k != '_id'}
-                update_data['usage_history'] = usage_history
-                
-                await self.db.collection.update_one(
-                    filter={'name': provider_name},
-                    update={'$set': update_data}
-                )
+        self.metrics.record(provider_name, model, latency=latency, failed=failed)
+
+        if failed:
+            self.circuits.record_failure((provider_name, model), status_code)
         else:
-            update_data = {k: v for k, v in new_data.items() if k != '_id'}
-            await self.db.collection.update_one(
-                filter={'name': provider_name},
-                update={'$set': update_data}
-            )
\ No newline at end of file
+            self.circuits.record_success(
+                (provider_name, model),
+                response_time if response_time is not None else latency
+            )
@@ -0,0 +1,469 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateMany
+from typing import Dict, Any, Optional, List, Set, Tuple, Callable, Mapping
+from ..client import DatabaseClient
+from ...circuit_breaker import CircuitBreakerRegistry
+
+@dataclass
+class SubProviderConfig:
+    sync_interval: float = 5.0
+    refresh_interval: float = 60.0
+    default_park_seconds: float = 60.0
+    min_park_seconds: float = 1.0
+    max_park_seconds: float = 3600.0
+    default_capacity: float = 500.0
+    candidate_count: int = 3
+
+class RateLimitHeaders:
+    DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+    @classmethod
+    def parse_duration(cls, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+
+        try:
+            return float(value)
+        except ValueError:
+            pass
+
+        units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+        matches = cls.DURATION_PATTERN.findall(value)
+        if not matches:
+            return None
+
+        return sum(float(amount) * units[unit] for amount, unit in matches)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+
+        try:
+            return float(value)
+        except ValueError:
+            pass
+
+        try:
+            return parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def get_reset_seconds(cls, headers: Mapping[str, str]) -> Optional[float]:
+        retry_after = cls.parse_retry_after(headers.get('retry-after'))
+        if retry_after is not None:
+            return retry_after
+
+        resets = [
+            reset
+            for name in ['x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens']
+            if (reset := cls.parse_duration(headers.get(name))) is not None
+        ]
+        return max(resets) if resets else None
+
+    @staticmethod
+    def get_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+        try:
+            return int(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+@dataclass
+class SubProviderBudget:
+    remaining_requests: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    requests_reset_at: float = 0.0
+    tokens_reset_at: float = 0.0
+
+    def get_remaining_requests(self, now: float) -> Optional[int]:
+        if self.remaining_requests is None or now >= self.requests_reset_at:
+            return None
+        return self.remaining_requests
+
+    def get_remaining_tokens(self, now: float) -> Optional[int]:
+        if self.remaining_tokens is None or now >= self.tokens_reset_at:
+            return None
+        return self.remaining_tokens
+
+    def can_serve(self, token_count: int, now: float) -> bool:
+        remaining_requests = self.get_remaining_requests(now)
+        if remaining_requests is not None and remaining_requests <= 0:
+            return False
+
+        remaining_tokens = self.get_remaining_tokens(now)
+        return remaining_tokens is None or remaining_tokens >= token_count
+
+    def reserve(self, token_count: int) -> None:
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= token_count
+
+class SubProviderDatabase:
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return DatabaseClient.get_collection('sub_providers')
+
+class SubProviderPool:
+    def __init__(self, default_capacity: float = 1.0):
+        self.default_capacity = default_capacity
+        self.sub_providers: Dict[str, Dict[str, Any]] = {}
+        self.capacities: Dict[str, float] = {}
+        self.heaps: Dict[str, List[Tuple[float, float, int, str]]] = {}
+        self.sequence = itertools.count()
+
+    @staticmethod
+    def get_models(sub_provider: Dict[str, Any]) -> Set[str]:
+        return {
+            model['api_name']
+            for model in sub_provider.get('models', [])
+            if isinstance(model, dict) and 'api_name' in model
+        }
+
+    def _get_score(self, sub_provider: Dict[str, Any]) -> float:
+        capacity = self.capacities.get(sub_provider['api_key'], self.default_capacity)
+        return sub_provider.get('usage', 0) / capacity
+
+    def _create_entry(self, sub_provider: Dict[str, Any]) -> Tuple[float, float, int, str]:
+        return (
+            self._get_score(sub_provider),
+            sub_provider.get('last_used', 0),
+            next(self.sequence),
+            sub_provider['api_key']
+        )
+
+    def load(self, sub_providers: List[Dict[str, Any]]) -> None:
+        self.sub_providers = {}
+        self.heaps = {}
+
+        for sub_provider in sub_providers:
+            self.sub_providers[sub_provider['api_key']] = sub_provider
+            for model in self.get_models(sub_provider):
+                self.heaps.setdefault(model, []).append(self._create_entry(sub_provider))
+
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def add(self, sub_provider: Dict[str, Any]) -> None:
+        if sub_provider['api_key'] in self.sub_providers:
+            return
+
+        api_key = sub_provider['api_key']
+        self.sub_providers[api_key] = sub_provider
+
+        for model in self.get_models(sub_provider):
+            heap = [entry for entry in self.heaps.get(model, []) if entry[3] != api_key]
+            heap.append(self._create_entry(sub_provider))
+            heapq.heapify(heap)
+            self.heaps[model] = heap
+
+    def remove(self, api_key: str) -> Optional[Dict[str, Any]]:
+        return self.sub_providers.pop(api_key, None)
+
+    def set_capacity(self, api_key: str, capacity: float) -> None:
+        if capacity > 0:
+            self.capacities[api_key] = capacity
+
+    def acquire(
+        self,
+        model: str,
+        is_available: Optional[Callable[[str], bool]] = None,
+        rank: Optional[Callable[[str], float]] = None,
+        candidate_count: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        heap = self.heaps.get(model)
+        skipped: List[Tuple[float, float, int, str]] = []
+        candidates: List[Tuple[float, float, int, str]] = []
+
+        try:
+            while heap and len(candidates) < candidate_count:
+                score, last_used, _, api_key = heap[0]
+                sub_provider = self.sub_providers.get(api_key)
+
+                if not sub_provider or model not in self.get_models(sub_provider):
+                    heapq.heappop(heap)
+                    continue
+
+                if (score, last_used) != (self._get_score(sub_provider), sub_provider.get('last_used', 0)):
+                    heapq.heapreplace(heap, self._create_entry(sub_provider))
+                    continue
+
+                if is_available and not is_available(api_key):
+                    skipped.append(heapq.heappop(heap))
+                    continue
+
+                candidates.append(heapq.heappop(heap))
+
+            if not candidates:
+                return None
+
+            chosen = max(candidates, key=lambda entry: rank(entry[3])) if rank else candidates[0]
+            skipped.extend(entry for entry in candidates if entry is not chosen)
+
+            sub_provider = self.sub_providers[chosen[3]]
+            sub_provider['usage'] = sub_provider.get('usage', 0) + 1
+            sub_provider['last_used'] = time.time()
+            heapq.heappush(heap, self._create_entry(sub_provider))
+            return sub_provider
+        finally:
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+
+class SubProviderManager:
+    def __init__(
+        self,
+        provider_name: str,
+        config: Optional[SubProviderConfig] = None
+    ):
+        self.db = SubProviderDatabase()
+        self.provider_name = provider_name
+        self.config = config or SubProviderConfig()
+        self.pool = SubProviderPool(self.config.default_capacity)
+        self.circuits = CircuitBreakerRegistry()
+        self.parked: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.budgets: Dict[str, SubProviderBudget] = {}
+        self.pending_usage: Dict[str, int] = {}
+        self.pending_last_used: Dict[str, float] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self.task: Optional[asyncio.Task] = None
+
+    async def create_indexes(self) -> None:
+        await self.db.collection.create_index([
+            ('main_provider', ASCENDING),
+            ('models.api_name', ASCENDING)
+        ])
+        await self.db.collection.create_index('api_key')
+
+    async def refresh_pool(self) -> None:
+        now = time.time()
+        sub_providers = await self.db.collection.find({
+            'main_provider': self.provider_name,
+            '$and': [
+                {
+                    '$or': [
+                        {'working': True},
+                        {'working': {'$exists': False}}
+                    ]
+                },
+                {
+                    '$or': [
+                        {'parked_until': {'$exists': False}},
+                        {'parked_until': {'$lte': now}}
+                    ]
+                }
+            ]
+        }).to_list(length=None)
+
+        sub_providers = [
+            sub_provider for sub_provider in sub_providers
+            if self.parked.get(sub_provider['api_key'], (0, None))[0] <= now
+        ]
+
+        for sub_provider in sub_providers:
+            api_key = sub_provider['api_key']
+            sub_provider['usage'] = sub_provider.get('usage', 0) + self.pending_usage.get(api_key, 0)
+            sub_provider['last_used'] = max(
+                sub_provider.get('last_used', 0),
+                self.pending_last_used.get(api_key, 0)
+            )
+
+        self.pool.load(sub_providers)
+        self.loaded = True
+
+    async def _ensure_pool(self) -> None:
+        if self.loaded:
+            return
+
+        async with self.lock:
+            if not self.loaded:
+                await self.refresh_pool()
+
+    def _is_available(self, api_key: str, token_count: int, now: float) -> bool:
+        if not self.circuits.is_available(api_key):
+            return False
+
+        budget = self.budgets.get(api_key)
+        return budget is None or budget.can_serve(token_count, now)
+
+    def _rank_by_remaining_tokens(self, api_key: str, now: float) -> float:
+        budget = self.budgets.get(api_key)
+        remaining_tokens = budget.get_remaining_tokens(now) if budget else None
+        return float('inf') if remaining_tokens is None else remaining_tokens
+
+    async def get_available_provider(
+        self,
+        model: str,
+        token_count: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        await self._ensure_pool()
+
+        now = time.time()
+        token_count = token_count or 0
+        sub_provider = self.pool.acquire(
+            model,
+            is_available=lambda api_key: self._is_available(api_key, token_count, now),
+            rank=lambda api_key: self._rank_by_remaining_tokens(api_key, now),
+            candidate_count=self.config.candidate_count
+        )
+        if not sub_provider:
+            return None
+
+        api_key = sub_provider['api_key']
+        if not self.circuits.try_acquire(api_key):
+            return None
+
+        if api_key in self.budgets:
+            self.budgets[api_key].reserve(token_count)
+
+        self.pending_usage[api_key] = self.pending_usage.get(api_key, 0) + 1
+        self.pending_last_used[api_key] = sub_provider['last_used']
+
+        return sub_provider.copy()
+
+    async def sync_usage(self) -> None:
+        if not self.pending_usage:
+            return
+
+        pending_usage, self.pending_usage = self.pending_usage, {}
+        pending_last_used, self.pending_last_used = self.pending_last_used, {}
+
+        try:
+            await self.db.collection.bulk_write(
+                [
+                    UpdateMany(
+                        {'api_key': api_key},
+                        {
+                            '$inc': {'usage': usage},
+                            '$max': {'last_used': pending_last_used.get(api_key, 0)}
+                        }
+                    )
+                    for api_key, usage in pending_usage.items()
+                ],
+                ordered=False
+            )
+        except Exception as e:
+            print(f'Failed to sync sub-provider usage: {str(e)}')
+
+    def update_rate_limits(self, api_key: str, headers: Mapping[str, str]) -> None:
+        limit = RateLimitHeaders.get_int(headers, 'x-ratelimit-limit-requests')
+        if limit:
+            self.pool.set_capacity(api_key, limit)
+
+        remaining_requests = RateLimitHeaders.get_int(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens = RateLimitHeaders.get_int(headers, 'x-ratelimit-remaining-tokens')
+
+        if remaining_requests is None and remaining_tokens is None:
+            return
+
+        now = time.time()
+        budget = self.budgets.setdefault(api_key, SubProviderBudget())
+
+        if remaining_requests is not None:
+            reset = RateLimitHeaders.parse_duration(headers.get('x-ratelimit-reset-requests'))
+            budget.remaining_requests = remaining_requests
+            budget.requests_reset_at = now + (reset if reset is not None else 60)
+
+        if remaining_tokens is not None:
+            reset = RateLimitHeaders.parse_duration(headers.get('x-ratelimit-reset-tokens'))
+            budget.remaining_tokens = remaining_tokens
+            budget.tokens_reset_at = now + (reset if reset is not None else 60)
+
+    async def park_provider(
+        self,
+        api_key: str,
+        headers: Mapping[str, str]
+    ) -> float:
+        park_seconds = RateLimitHeaders.get_reset_seconds(headers)
+        if park_seconds is None:
+            park_seconds = self.config.default_park_seconds
+
+        parked_until = time.time() + min(
+            self.config.max_park_seconds,
+            max(self.config.min_park_seconds, park_seconds)
+        )
+
+        sub_provider = self.pool.remove(api_key)
+        if sub_provider is None and api_key in self.parked:
+            sub_provider = self.parked[api_key][1]
+
+        if sub_provider is not None:
+            self.parked[api_key] = (
+                max(parked_until, self.parked.get(api_key, (0, None))[0]),
+                sub_provider
+            )
+
+        await self.db.collection.update_many(
+            filter={'api_key': api_key},
+            update={'$max': {'parked_until': parked_until}}
+        )
+        return parked_until
+
+    def release_parked_providers(self) -> None:
+        now = time.time()
+
+        for api_key, (parked_until, sub_provider) in list(self.parked.items()):
+            if parked_until <= now:
+                del self.parked[api_key]
+                self.pool.add(sub_provider)
+
+    def record_success(self, api_key: str, latency: Optional[float] = None) -> None:
+        self.circuits.record_success(api_key, latency)
+
+    def record_failure(self, api_key: str, status_code: Optional[int] = None) -> None:
+        self.circuits.record_failure(api_key, status_code)
+
+    async def disable_provider(
+        self,
+        api_key: str
+    ) -> None:
+        self.pool.remove(api_key)
+        self.parked.pop(api_key, None)
+        await self.db.collection.update_many(
+            filter={'api_key': api_key},
+            update={'$set': {'working': False}}
+        )
+
+    async def run(self) -> None:
+        last_refresh = time.monotonic()
+
+        while True:
+            try:
+                await asyncio.sleep(self.config.sync_interval)
+                await self.sync_usage()
+                self.release_parked_providers()
+
+                if time.monotonic() - last_refresh >= self.config.refresh_interval:
+                    await self.refresh_pool()
+                    last_refresh = time.monotonic()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f'Sub-provider sync error ({self.provider_name}): {str(e)}')
+
+    async def start(self) -> None:
+        try:
+            await self.create_indexes()
+        except Exception as e:
+            print(f'Failed to create sub-provider indexes: {str(e)}')
+
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        await self.sync_usage()
@@ -1,16 +1,110 @@
-from typing import Dict, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+from ..client import DatabaseClient
 from ..exceptions import DatabaseError
 from ...config import Settings
 
 settings = Settings()
 
 class UserDatabase:
-    def __init__(self):
-        self.client = AsyncIOMotorClient(settings.db_url)
-        self.collection = self.client['db']['users']
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return DatabaseClient.get_collection('users')
+
+class UserCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self.keys_by_user_id: Dict[str, str] = {}
+        self.keys_by_document_id: Dict[Any, str] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+
+        expires_at, user = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return user.copy()
+
+    def set(self, key: str, user: Dict[str, Any]) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl, user.copy())
+        self.keys_by_user_id[user.get('user_id')] = key
+        self.keys_by_document_id[user.get('_id')] = key
+
+        while len(self.entries) > self.max_size:
+            self._remove(next(iter(self.entries)))
+
+    def invalidate(
+        self,
+        user_id: Optional[str] = None,
+        key: Optional[str] = None,
+        document_id: Optional[Any] = None
+    ) -> None:
+        if user_id is not None:
+            key = self.keys_by_user_id.get(user_id)
+        elif document_id is not None:
+            key = self.keys_by_document_id.get(document_id)
+
+        if key:
+            self._remove(key)
+
+    def update(
+        self,
+        fields: Dict[str, Any],
+        user_id: Optional[str] = None,
+        document_id: Optional[Any] = None
+    ) -> None:
+        key = (
+            self.keys_by_user_id.get(user_id)
+            if user_id is not None
+            else self.keys_by_document_id.get(document_id)
+        )
+        entry = self.entries.get(key) if key else None
+
+        if entry:
+            entry[1].update(fields)
+
+    def increment(self, user_id: str, field: str, amount: float) -> None:
+        key = self.keys_by_user_id.get(user_id)
+        entry = self.entries.get(key) if key else None
+
+        if entry and field in entry[1]:
+            entry[1][field] += amount
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.keys_by_user_id.clear()
+        self.keys_by_document_id.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+
+        _, user = entry
+        if self.keys_by_user_id.get(user.get('user_id')) == key:
+            del self.keys_by_user_id[user.get('user_id')]
+        if self.keys_by_document_id.get(user.get('_id')) == key:
+            del self.keys_by_document_id[user.get('_id')]
 
 class UserManager:
+    cache = UserCache(
+        max_size=settings.user_cache_size,
+        ttl=settings.user_cache_ttl
+    )
+
     def __init__(self):
         self.db = UserDatabase()
 
@@ -19,12 +113,22 @@ class UserManager:
         user_id: Optional[int] = None,
         key: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
+        if not user_id and key:
+            cached_user = self.cache.get(key)
+            if cached_user:
+                return cached_user
+
         try:
             query = {'user_id': user_id} if user_id else {'key': key}
-            return await self.db.collection.find_one(query)
+            user = await self.db.collection.find_one(query)
         except Exception as e:
             raise DatabaseError(f'Failed to retrieve user: {str(e)}')
 
+        if user and not user_id:
+            self.cache.set(key, user)
+
+        return user
+
     async def update_user(
         self,
         user_id: str,
@@ -39,4 +143,59 @@ class UserManager:
             )
 
         except Exception as e:
-            raise DatabaseError(f'Failed to update user: {str(e)}')
\ No newline at end of file
+            raise DatabaseError(f'Failed to update user: {str(e)}')
+        finally:
+            self.cache.invalidate(user_id=user_id)
+
+    async def deduct_credits(
+        self,
+        user_id: str,
+        amount: float
+    ) -> None:
+        try:
+            await self.db.collection.update_one(
+                filter={'user_id': user_id},
+                update={'$inc': {'credits': -amount}}
+            )
+        except Exception as e:
+            raise DatabaseError(f'Failed to deduct credits: {str(e)}')
+
+        self.cache.increment(user_id, 'credits', -amount)
+
+    async def reserve_credits(
+        self,
+        user_id: str,
+        amount: float
+    ) -> bool:
+        try:
+            result = await self.db.collection.update_one(
+                filter={'user_id': user_id, 'credits': {'$gte': amount}},
+                update={'$inc': {'credits': -amount}}
+            )
+        except Exception as e:
+            raise DatabaseError(f'Failed to reserve credits: {str(e)}')
+
+        if not result.modified_count:
+            return False
+
+        self.cache.increment(user_id, 'credits', -amount)
+        return True
+
+    async def reconcile_credits(
+        self,
+        user_id: str,
+        reserved: float,
+        used: float
+    ) -> None:
+        if reserved == used:
+            return
+
+        try:
+            await self.db.collection.update_one(
+                filter={'user_id': user_id},
+                update={'$inc': {'credits': reserved - used}}
+            )
+        except Exception as e:
+            raise DatabaseError(f'Failed to reconcile credits: {str(e)}')
+
+        self.cache.increment(user_id, 'credits', reserved - used)
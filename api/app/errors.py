@@ -3,7 +3,6 @@ from dataclasses import dataclass
 from typing import Dict, Any, Callable, Awaitable, Type, Optional
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.exceptions import RequestValidationError
-from slowapi.errors import RateLimitExceeded
 from .responses import PrettyJSONResponse
 
 @dataclass
@@ -36,8 +35,7 @@ class ExceptionHandler:
             405: self._handle_method_not_allowed,
             Exception: self._handle_generic_exception,
             HTTPException: self._handle_http_exception,
-            RequestValidationError: self._handle_validation_exception,
-            RateLimitExceeded: self._handle_rate_limit_exceeded
+            RequestValidationError: self._handle_validation_exception
         })
 
     @staticmethod
@@ -101,20 +99,12 @@ class ExceptionHandler:
             code=exc.status_code,
             status_code=exc.status_code
         )
-        return self._create_json_response(error_response)
+        response = self._create_json_response(error_response)
 
-    async def _handle_rate_limit_exceeded(
-        self,
-        _: Request,
-        exc: RateLimitExceeded
-    ) -> PrettyJSONResponse:
-        error_response = self._create_error_response(
-            message=f'Rate limit exceeded: {exc.detail}',
-            error_type='invalid_request_error',
-            code=400,
-            status_code=exc.status_code
-        )
-        return self._create_json_response(error_response)
+        if exc.headers:
+            response.headers.update(exc.headers)
+
+        return response
 
     def _handle_not_found(
         self,
@@ -1,24 +1,44 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter
-from slowapi.middleware import SlowAPIMiddleware
 from contextlib import asynccontextmanager
-from .tasks import CreditsService
-from .providers import BaseProvider
+from .core import DatabaseClient, settings
+from .tasks import (
+    CreditsService,
+    UserCacheService,
+    ProviderMetricsService,
+    ProviderRoutingService
+)
+from .providers import BaseProvider, ModelRegistry
 from .errors import ExceptionHandler
-from .utils import RequestProcessor, RouteLoader
+from .responses import JSONFormatMiddleware
+from .utils import EncoderCache, RouteLoader
 
 credits_service = CreditsService()
+user_cache_service = UserCacheService()
+provider_metrics_service = ProviderMetricsService()
+provider_routing_service = ProviderRoutingService()
 base_provider = BaseProvider()
-request_processor = RequestProcessor()
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
+    EncoderCache.configure(settings.tiktoken_cache_dir)
+    await EncoderCache.warm(settings.tiktoken_encodings)
+    DatabaseClient.connect()
     await credits_service.start()
+    await user_cache_service.start()
+    await provider_metrics_service.start()
     await base_provider.import_modules()
     await base_provider.sync_to_db()
+    ModelRegistry.freeze()
+    await base_provider.start_instances()
+    await provider_routing_service.start()
     yield
+    await provider_routing_service.stop()
+    await base_provider.close_instances()
+    await provider_metrics_service.stop()
+    await user_cache_service.stop()
     await credits_service.stop()
+    DatabaseClient.close()
  
 app = FastAPI(
     docs_url=None,
@@ -26,14 +46,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-app.state.limiter = Limiter(
-    key_func=request_processor.get_api_key,
-    default_limits=[
-        '2/second',
-        '30/minute'
-    ]
+app.add_middleware(
+    JSONFormatMiddleware,
+    pretty=settings.pretty_json
 )
-app.add_middleware(SlowAPIMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
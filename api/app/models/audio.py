@@ -1,11 +1,17 @@
 from pydantic import BaseModel, field_validator
 from typing import Optional
+from ..providers import ModelRegistry
 
 class SpeechRequest(BaseModel):
     model: str
     input: str
     voice: Optional[str] = None
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('input')
     @classmethod
     def validate_input(cls, value: str) -> str:
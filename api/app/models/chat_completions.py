@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Any, Optional, Union, Literal
+from ..providers import ModelRegistry
 
 class ImageURL(BaseModel):
     detail: Literal['auto', 'low', 'high'] = 'auto'
@@ -31,6 +32,11 @@ class ChatRequest(BaseModel):
     tools: Optional[List[Dict[str, Any]]] = None
     provider_name: Optional[str] = None
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('messages')
     @classmethod
     def validate_messages(cls, messages: List[Message]) -> List[Message]:
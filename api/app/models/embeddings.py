@@ -1,11 +1,17 @@
 from pydantic import BaseModel, field_validator
 from typing import List, Iterable, Optional, Any, Union
+from ..providers import ModelRegistry
 
 class EmbeddingsRequest(BaseModel):
     model: str
     input: Union[str, List[str], Iterable[int], Iterable[Iterable[int]]]
     dimensions: Optional[int] = None
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('input')
     @classmethod
     def validate_input(
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, field_validator
 from typing import Literal, Optional
+from ..providers import ModelRegistry
 
 class ImageRequest(BaseModel):
     model: str
@@ -8,6 +9,11 @@ class ImageRequest(BaseModel):
     size: Literal['256x256', '512x512', '1024x1024', '1792x1024', '1024x1792'] = '1024x1024'
     negative_prompt: Optional[str] = None
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('prompt')
     @classmethod
     def validate_prompt(cls, value: str) -> str:
@@ -1,10 +1,16 @@
 from pydantic import BaseModel, field_validator
 from typing import List, Union
+from ..providers import ModelRegistry
 
 class ModerationRequest(BaseModel):
     model: str
     input: Union[str, List[str]]
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('input')
     @classmethod
     def validate_input(cls, value: Union[str, List[str]]) -> Union[str, List[str]]:
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, field_validator
 from typing import Optional
+from ..providers import ModelRegistry
 
 class TextTranslationsRequest(BaseModel):
     model: str
@@ -7,6 +8,11 @@ class TextTranslationsRequest(BaseModel):
     source_lang: Optional[str] = None
     target_lang: Optional[str] = None
 
+    @field_validator('model')
+    @classmethod
+    def validate_model(cls, value: str) -> str:
+        return ModelRegistry.resolve(value) or value
+
     @field_validator('text')
     @classmethod
     def validate_text(cls, value: str) -> str:
@@ -1,4 +1,4 @@
 from .base_provider import BaseProvider
-from .ai_models import Model
+from .ai_models import Model, ModelRegistry
 
-__all__ = ['BaseProvider', 'Model']
\ No newline at end of file
+__all__ = ['BaseProvider', 'Model', 'ModelRegistry']
\ No newline at end of file
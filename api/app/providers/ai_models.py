@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Union, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Union, Optional, Tuple, FrozenSet
 
 @dataclass
 class ModelPricingInfo:
@@ -19,13 +20,20 @@ class Model:
     is_early_access: bool = False
     pricing: ModelPricingInfo = field(default_factory=ModelPricingInfo)
     voices: List[str] = field(default_factory=list)
+    aliases: List[str] = field(default_factory=list)
+    tokenizer: Optional[str] = None
+
+    @property
+    def endpoints(self) -> Tuple[str, ...]:
+        return (self.endpoint,) if isinstance(self.endpoint, str) else tuple(self.endpoint)
 
     def to_json(self) -> Dict[str, Any]:
         model_dict = self.__dict__.copy()
         model_dict['pricing'] = self.pricing.to_json()
 
-        if not model_dict['voices']:
-            del model_dict['voices']
+        for optional_field in ['voices', 'aliases', 'tokenizer']:
+            if not model_dict[optional_field]:
+                del model_dict[optional_field]
 
         return model_dict
 
@@ -35,22 +43,67 @@ class Model:
     
     @classmethod
     def get_model(cls, model_id: str) -> Optional['Model']:
-        return next(
-            (
-                model for model in ModelRegistry.models.values()
-                if model.id == model_id
-            ),
-            None
-        )
+        return ModelRegistry.get(model_id)
 
 class ModelRegistryMeta(type):
     def __init__(cls, name: str, bases: tuple, attrs: Dict[str, Any]):
         super().__init__(name, bases, attrs)
-        cls.models = {
-            value.id: value
-            for value in attrs.values()
-            if isinstance(value, Model)
-        }
+        cls.models = {}
+        cls.aliases = {}
+        cls.endpoint_models = {}
+        cls.frozen = False
+
+        for value in attrs.values():
+            if isinstance(value, Model):
+                cls.register(value)
+
+    def register(cls, model: Model) -> None:
+        if cls.frozen:
+            raise RuntimeError(f'Cannot register model {model.id}: the model registry is frozen')
+
+        if model.id in cls.models or model.id in cls.aliases:
+            raise ValueError(f'Duplicate model id: {model.id}')
+
+        cls.models[model.id] = model
+
+        for alias in model.aliases:
+            if alias in cls.models or alias in cls.aliases:
+                raise ValueError(f'Duplicate model alias: {alias}')
+            cls.aliases[alias] = model.id
+
+        for endpoint in model.endpoints:
+            cls.endpoint_models[endpoint] = cls.endpoint_models.get(endpoint, ()) + (model,)
+
+    def freeze(cls) -> None:
+        if cls.frozen:
+            return
+
+        cls.models = MappingProxyType(dict(cls.models))
+        cls.aliases = MappingProxyType(dict(cls.aliases))
+        cls.endpoint_models = MappingProxyType(dict(cls.endpoint_models))
+        cls.frozen = True
+
+    def resolve(cls, model_id: str) -> Optional[str]:
+        if model_id in cls.models:
+            return model_id
+        return cls.aliases.get(model_id)
+
+    def get(cls, model_id: str) -> Optional[Model]:
+        model = cls.models.get(model_id)
+        if model is None and model_id in cls.aliases:
+            model = cls.models[cls.aliases[model_id]]
+        return model
+
+    def get_by_endpoint(cls, endpoint: str) -> Tuple[Model, ...]:
+        return cls.endpoint_models.get(endpoint, ())
+
+    def get_endpoints(cls, model_id: str) -> FrozenSet[str]:
+        model = cls.get(model_id)
+        return frozenset(model.endpoints) if model else frozenset()
+
+    def supports_endpoint(cls, model_id: str, endpoint: str) -> bool:
+        model = cls.get(model_id)
+        return model is not None and endpoint in model.endpoints
 
 class ModelRegistry(metaclass=ModelRegistryMeta):
     gpt_35_turbo = Model(
@@ -3,9 +3,9 @@ import inspect
 import importlib
 from dataclasses import dataclass
 from typing import List, Optional, Type, ClassVar, Set, Dict, Any
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorCollection
 from asgiref.sync import sync_to_async
-from ..core import settings
+from ..core import DatabaseClient
 
 @dataclass(frozen=True)
 class ProviderConfig:
@@ -26,10 +26,10 @@ class ProviderConfig:
         return self.free_models + self.paid_models + self.early_access_models
 
 class DatabaseManager:
-    def __init__(self, db_url: str):
+    @property
+    def db(self) -> AsyncIOMotorCollection:
         try:
-            self.client = AsyncIOMotorClient(db_url)
-            self.db = self.client['db']['providers']
+            return DatabaseClient.get_collection('providers')
         except Exception as e:
             raise ConnectionError(f'Database connection failed: {e}')
 
@@ -60,7 +60,7 @@ class DatabaseManager:
 
     def _create_model_metrics(self, models: List[str]) -> Dict[str, Dict[str, int]]:
         return {
-            metric: {model: 0 for model in models}
+            metric: {DatabaseClient.encode_field(model): 0 for model in models}
             for metric in ['usage', 'failures', 'latency']
         }
 
@@ -92,9 +92,23 @@ class ModuleLoader:
 
 class BaseProvider:
     config: ClassVar[ProviderConfig] = ProviderConfig(name='')
+    _instances: ClassVar[Dict[Type['BaseProvider'], 'BaseProvider']] = {}
 
     def __init__(self):
-        self.db_manager = DatabaseManager(settings.db_url)
+        self.db_manager = DatabaseManager()
+
+    @classmethod
+    def get_instance(cls) -> 'BaseProvider':
+        instance = BaseProvider._instances.get(cls)
+        if instance is None:
+            instance = BaseProvider._instances[cls] = cls()
+        return instance
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
 
     @classmethod
     def get_provider_class(cls, name: str) -> Optional[Type['BaseProvider']]:
@@ -114,6 +128,26 @@ class BaseProvider:
 
     async def import_modules(self) -> None:
         await ModuleLoader.import_modules(self.__class__)
+        self.create_instances()
+
+    def create_instances(self) -> None:
+        for provider_class in self.__class__.__subclasses__():
+            provider_class.get_instance()
+
+    async def start_instances(self) -> None:
+        for instance in list(BaseProvider._instances.values()):
+            try:
+                await instance.start()
+            except Exception as e:
+                print(f'Failed to start provider {instance.config.name}: {e}')
+
+    async def close_instances(self) -> None:
+        for instance in list(BaseProvider._instances.values()):
+            try:
+                await instance.close()
+            except Exception as e:
+                print(f'Failed to close provider {instance.config.name}: {e}')
+        BaseProvider._instances.clear()
 
     async def sync_to_db(self) -> None:
         try:
@@ -1,20 +1,20 @@
-import ujson
+import asyncio
 import time
 import httpx
 import traceback
 import re
+import importlib.util
 from dataclasses import dataclass
 from fastapi import Request, Response, UploadFile
 from fastapi.responses import StreamingResponse
 from starlette.background import BackgroundTask
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Dict, Any, Tuple, Iterable, AsyncGenerator, Optional, Union
-from ...responses import PrettyJSONResponse
-from ...core import UserManager, ProviderManager, settings
-from ...utils import RequestProcessor
+from typing import List, Dict, Any, Tuple, Iterable, AsyncGenerator, Coroutine, Optional, Set, Union
+from ...responses import PrettyJSONResponse, PeekableStreamingResponse
+from ...core import UserManager, ProviderManager, SubProviderManager
+from ...utils import StreamTokenCounter, request_processor
 from ..ai_models import Model
 from ..base_provider import BaseProvider, ProviderConfig
-from ..utils import WebhookManager, ErrorHandler
+from ..utils import WebhookManager, ErrorHandler, StreamChunkRelay, DeferredBilling
 
 @dataclass(frozen=True)
 class OpenAIConfig:
@@ -22,57 +22,48 @@ class OpenAIConfig:
     provider_id: str = 'oai'
     timeout: int = 100
     long_timeout: int = 10000
-
-class SubProviderManager:
-    def __init__(self, db_client: AsyncIOMotorClient, provider_name: str):
-        self.collection = db_client['db']['sub_providers']
-        self.provider_name = provider_name
-
-    async def get_available_provider(self, model: str) -> Optional[Dict[str, Any]]:
-        sub_providers = await self.collection.find({
-            'main_provider': self.provider_name,
-            'models.api_name': {'$in': [model]},
-            '$or': [
-                {'working': True},
-                {'working': {'$exists': False}}
-            ]
-        }).to_list(length=None)
-
-        if not sub_providers:
-            return None
-
-        return min(
-            sub_providers,
-            key=lambda x: (x.get('usage', 0), x.get('last_used', 0))
-        )
-
-    async def update_provider(
-        self,
-        api_key: str,
-        new_data: Dict[str, Any]
-    ) -> None:
-        update_data = {k: v for k, v in new_data.items() if k != '_id'}
-        await self.collection.update_many(
-            filter={'api_key': api_key},
-            update={'$set': update_data}
-        )
-
-    async def disable_provider(
-        self,
-        api_key: str
-    ) -> None:
-        await self.collection.update_many(
-            filter={'api_key': api_key},
-            update={'$set': {'working': False}}
-        )
+    connect_timeout: float = 10.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    max_connections: int = 1000
+    max_keepalive_connections: int = 200
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    stream_flush_interval: float = 5.0
 
 class APIClient:
     def __init__(self, config: OpenAIConfig):
         self.config = config
+        self.timeout = self._create_timeout(self.config.timeout)
+        self.long_timeout = self._create_timeout(self.config.long_timeout)
         self.client = httpx.AsyncClient(
-            timeout=self.config.timeout
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry
+            ),
+            http2=self._supports_http2()
+        )
+
+    def _create_timeout(self, read_timeout: float) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.config.connect_timeout,
+            read=read_timeout,
+            write=self.config.write_timeout,
+            pool=self.config.pool_timeout
         )
 
+    def _supports_http2(self) -> bool:
+        if not self.config.http2:
+            return False
+
+        if importlib.util.find_spec('h2') is None:
+            print('HTTP/2 requested for upstream client but "h2" is not installed, using HTTP/1.1')
+            return False
+
+        return True
+
     async def make_request(
         self,
         endpoint: str,
@@ -89,20 +80,21 @@ class APIClient:
         }
         url = f'{self.config.base_url}/v1/{endpoint}'
 
-        if long_timeout:
-            self.client.timeout = self.config.long_timeout
-
         return await self.client.send(
             self.client.build_request(
                 method=method,
                 url=url,
                 headers=headers,
                 json=data,
-                files=files
+                files=files,
+                timeout=self.long_timeout if long_timeout else self.timeout
             ),
             stream=stream
         )
 
+    async def close(self) -> None:
+        await self.client.aclose()
+
 class ResponseHandler:
     def __init__(self, config: OpenAIConfig):
         self.config = config
@@ -148,7 +140,22 @@ class MetricsManager:
         self.user_manager = user_manager
         self.provider_manager = provider_manager
         self.sub_provider_manager = sub_provider_manager
-        self.request_processor = RequestProcessor()
+        self.request_processor = request_processor
+        self.background_tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, coroutine: Coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f'Background metrics task failed: {task.exception()}')
+
+    async def drain(self) -> None:
+        while self.background_tasks:
+            await asyncio.gather(*self.background_tasks, return_exceptions=True)
 
     async def update_user_credits(
         self,
@@ -157,8 +164,24 @@ class MetricsManager:
         token_count: int
     ) -> None:
         model_instance = Model.get_model(model)
-        request.state.user['credits'] -= token_count * model_instance.pricing.multiplier
-        await self.user_manager.update_user(request.state.user['user_id'], request.state.user)
+        await self.deduct_user_credits(
+            request, token_count * model_instance.pricing.multiplier
+        )
+
+    async def deduct_user_credits(
+        self,
+        request: Request,
+        amount: float
+    ) -> None:
+        await DeferredBilling.submit(self._deduct_user_credits(request, amount))
+
+    async def _deduct_user_credits(
+        self,
+        request: Request,
+        amount: float
+    ) -> None:
+        request.state.user['credits'] -= amount
+        await self.user_manager.deduct_credits(request.state.user['user_id'], amount)
 
     async def update_metrics(
         self,
@@ -169,26 +192,32 @@ class MetricsManager:
         start_time: float
     ) -> None:
         elapsed = time.time() - start_time
-        word_count, token_count = self._calculate_counts(response_data)
+        word_count, token_count = self._calculate_counts(response_data, model)
         
         await self._update_provider_metrics(request, model, elapsed, word_count)
-        await self._update_sub_provider_metrics(sub_provider)
         await self.update_user_credits(
             request, model, token_count
         )
 
-    def _calculate_counts(self, response_data: Dict[str, Any]) -> Tuple[int, int]:
+    def _calculate_counts(
+        self,
+        response_data: Dict[str, Any],
+        model: str
+    ) -> Tuple[int, int]:
         word_count = sum(
             len(choice['message']['content'])
             for choice in response_data['choices']
             if choice.get('message', {}).get('content', '')
         ) + self._count_additional_fields(response_data)
 
-        token_count = sum(
-            self.request_processor.count_tokens(choice['message']['content'])
-            for choice in response_data['choices']
-            if choice.get('message', {}).get('content', '')
-        )
+        token_count = (response_data.get('usage') or {}).get('completion_tokens')
+
+        if token_count is None:
+            token_count = sum(
+                self.request_processor.count_tokens(choice['message']['content'], model)
+                for choice in response_data['choices']
+                if choice.get('message', {}).get('content', '')
+            )
 
         return word_count, token_count
 
@@ -214,7 +243,6 @@ class MetricsManager:
     ) -> None:
         elapsed = time.time() - start_time
         await self._update_provider_metrics(request, model, elapsed, 1)
-        await self._update_sub_provider_metrics(sub_provider)
 
     async def _update_provider_metrics(
         self,
@@ -225,28 +253,43 @@ class MetricsManager:
     ) -> None:
         latency = (elapsed / word_count) if word_count > 0 else 0
 
-        request.state.provider['usage'][model] = request.state.provider['usage'].get(model, 0) + 1
-        request.state.provider['latency'][model] = (
-            (request.state.provider['latency'].get(model, 0) + latency) / 2 
-            if request.state.provider['latency'].get(model, 0) != 0 
-            else latency
-        )
-
-        await self.provider_manager.update_provider(
-            request.state.provider_name,
-            request.state.provider,
-            model
+        self.provider_manager.record_request(
+            self.sub_provider_manager.provider_name,
+            model,
+            latency=latency,
+            response_time=elapsed
         )
 
-    async def _update_sub_provider_metrics(
+class StreamCreditBuffer:
+    def __init__(
         self,
-        sub_provider: Dict[str, Any]
-    ) -> None:
-        sub_provider['usage'] = sub_provider.get('usage', 0) + 1
-        sub_provider['last_used'] = time.time()
-        await self.sub_provider_manager.update_provider(
-            sub_provider['api_key'],
-            sub_provider
+        metrics_manager: MetricsManager,
+        request: Request,
+        model: str,
+        flush_interval: float
+    ):
+        self.metrics_manager = metrics_manager
+        self.request = request
+        self.model = model
+        self.flush_interval = flush_interval
+        self.pending_tokens = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, token_count: int) -> None:
+        self.pending_tokens += token_count
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.last_flush = time.monotonic()
+        if not self.pending_tokens:
+            return
+
+        token_count, self.pending_tokens = self.pending_tokens, 0
+        self.metrics_manager.schedule(
+            self.metrics_manager.update_user_credits(
+                self.request, self.model, token_count
+            )
         )
 
 class StreamHandler:
@@ -257,7 +300,8 @@ class StreamHandler:
     ):
         self.metrics_manager = metrics_manager
         self.config = config
-        self.request_processor = RequestProcessor()
+        self.request_processor = request_processor
+        self.relay = StreamChunkRelay(self.config.provider_id)
 
     async def handle_stream(
         self,
@@ -266,42 +310,60 @@ class StreamHandler:
         model: str,
         sub_provider: Dict[str, Any],
         start_time: float
-    ) -> StreamingResponse:
+    ) -> PeekableStreamingResponse:
         async def stream_generator() -> AsyncGenerator[str, None]:
+            credit_buffer = StreamCreditBuffer(
+                self.metrics_manager,
+                request,
+                model,
+                self.config.stream_flush_interval
+            )
+
+            token_counter = StreamTokenCounter(self.request_processor.token_counter, model)
+
             await self.metrics_manager.update_streaming_metrics(
                 request, model, sub_provider, start_time
             )
 
-            async for line in response.aiter_lines():
-                if line.startswith('data: ') and not line.startswith('data: [DONE]'):
-                    yield await self._process_chunk(request, model, line)
+            try:
+                async for line in response.aiter_lines():
+                    if line.startswith('data: ') and not line.startswith('data: [DONE]'):
+                        chunk, content = self._process_chunk(line, token_counter)
+                        credit_buffer.add(token_counter.add_text(content))
 
-            yield 'data: [DONE]\n\n'
+                        if chunk:
+                            yield chunk
 
-        return StreamingResponse(
+                yield 'data: [DONE]\n\n'
+            finally:
+                try:
+                    credit_buffer.add(token_counter.finish())
+                finally:
+                    credit_buffer.flush()
+
+        return PeekableStreamingResponse(
             content=stream_generator(),
             media_type='text/event-stream',
             background=BackgroundTask(response.aclose)
         )
 
-    async def _process_chunk(
+    def _process_chunk(
         self,
-        request: Request,
-        model: str,
-        line: str
-    ) -> str:
-        parsed_chunk = {
-            'provider_id': self.config.provider_id,
-            **ujson.loads(line[6:].strip())
-        }
-        token_count = sum(
-            self.request_processor.count_tokens(choice.get('delta', {}).get('content', ''))
-            for choice in parsed_chunk.get('choices', [{}])
-        )
+        line: str,
+        token_counter: StreamTokenCounter
+    ) -> Tuple[Optional[str], str]:
+        payload = line[6:]
+        usage_chunk = self.relay.extract_usage(payload)
 
-        await self.metrics_manager.update_user_credits(request, model, token_count)
+        if usage_chunk:
+            completion_tokens = usage_chunk['usage'].get('completion_tokens')
+            if completion_tokens is not None:
+                token_counter.set_usage(completion_tokens)
 
-        return f'data: {ujson.dumps(parsed_chunk)}\n\n'
+            if not usage_chunk['has_choices']:
+                return None, ''
+
+        return self.relay.relay(payload), self.relay.extract_content(payload)
 
 class EndpointHandler:
     def __init__(
@@ -328,7 +390,8 @@ class EndpointHandler:
         self,
         request: Request,
         model: str,
-        text: str
+        text: str,
+        status_code: Optional[int] = None
     ) -> None:
         await WebhookManager.send_to_webhook(
             request=request,
@@ -338,13 +401,50 @@ class EndpointHandler:
             exception=f'Error: {text}'
         )
         
-        current_failure_count = request.state.provider['failures'].get(model, 0)
-        request.state.provider['failures'][model] = current_failure_count + 1
-        
-        await self.provider_manager.update_provider(
+        self.provider_manager.record_request(
             self.provider_config.name,
-            request.state.provider
+            model,
+            failed=True,
+            status_code=status_code
         )
+
+    def _record_success(self, model: str) -> None:
+        self.provider_manager.record_request(self.provider_config.name, model)
+
+    async def _make_request(
+        self,
+        model: str,
+        sub_provider: Dict[str, Any],
+        **kwargs
+    ) -> httpx.Response:
+        start_time = time.monotonic()
+
+        try:
+            response = await self.api_client.make_request(
+                sub_provider=sub_provider,
+                **kwargs
+            )
+        except Exception:
+            self.sub_provider_manager.record_failure(sub_provider['api_key'])
+            raise
+
+        self.sub_provider_manager.update_rate_limits(
+            sub_provider['api_key'],
+            response.headers
+        )
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.sub_provider_manager.record_failure(
+                sub_provider['api_key'],
+                response.status_code
+            )
+        else:
+            self.sub_provider_manager.record_success(
+                sub_provider['api_key'],
+                time.monotonic() - start_time if kwargs.get('stream') else None
+            )
+
+        return response
     
     async def _handle_api_error(
         self,
@@ -354,7 +454,14 @@ class EndpointHandler:
         request: Request,
         model: str
     ) -> PrettyJSONResponse:
-        if response.status_code in [401, 403, 404, 429]:
+        error_text = (await response.aread()).decode() if stream else response.text
+
+        if response.status_code == 429 and 'insufficient_quota' not in error_text:
+            await self.sub_provider_manager.park_provider(
+                sub_provider['api_key'],
+                response.headers
+            )
+        elif response.status_code in [401, 403, 404, 429]:
             await self.sub_provider_manager.disable_provider(
                 sub_provider['api_key']
             )
@@ -362,7 +469,8 @@ class EndpointHandler:
         await self._handle_error(
             request,
             model,
-            (await response.aread()).decode() if stream else response.text
+            error_text,
+            response.status_code
         )
         return self.response_handler.create_error_response()
 
@@ -384,7 +492,8 @@ class EndpointHandler:
             kwargs.pop('tool_choice', None)
             kwargs.pop('tools', None)
 
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='chat/completions',
             method='POST',
             sub_provider=sub_provider,
@@ -392,6 +501,7 @@ class EndpointHandler:
                 'model': model,
                 'messages': messages,
                 'stream': stream,
+                **({'stream_options': {'include_usage': True}} if stream else {}),
                 **kwargs
             },
             stream=stream
@@ -423,7 +533,8 @@ class EndpointHandler:
         prompt: str,
         sub_provider: Dict[str, Any]
     ) -> PrettyJSONResponse:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='images/generations',
             method='POST',
             sub_provider=sub_provider,
@@ -436,12 +547,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
-        model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price
+        self._record_success(model)
 
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        model_instance = Model.get_model(model)
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price
         )
 
         return PrettyJSONResponse(
@@ -456,7 +566,8 @@ class EndpointHandler:
         sub_provider: Dict[str, Any],
         **kwargs
     ) -> PrettyJSONResponse:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='embeddings',
             method='POST',
             sub_provider=sub_provider,
@@ -469,12 +580,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
-        model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price
+        self._record_success(model)
 
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        model_instance = Model.get_model(model)
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price
         )
 
         return PrettyJSONResponse(
@@ -488,7 +598,8 @@ class EndpointHandler:
         input_data: Union[str, List[str]],
         sub_provider: Dict[str, Any]
     ) -> PrettyJSONResponse:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='moderations',
             method='POST',
             sub_provider=sub_provider,
@@ -501,12 +612,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
-        model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price
+        self._record_success(model)
 
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        model_instance = Model.get_model(model)
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price
         )
 
         return PrettyJSONResponse(
@@ -521,7 +631,8 @@ class EndpointHandler:
         sub_provider: Dict[str, Any],
         **kwargs
     ) -> Response:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='audio/speech',
             method='POST',
             sub_provider=sub_provider,
@@ -534,11 +645,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
+        self._record_success(model)
+
         model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price + len(input_text)
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price + len(input_text)
         )
 
         return self.response_handler.create_audio_response(response.content)
@@ -550,7 +661,8 @@ class EndpointHandler:
         file: UploadFile,
         sub_provider: Dict[str, Any]
     ) -> PrettyJSONResponse:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='audio/transcriptions',
             method='POST',
             sub_provider=sub_provider,
@@ -564,12 +676,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
-        model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price
+        self._record_success(model)
 
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        model_instance = Model.get_model(model)
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price
         )
 
         return PrettyJSONResponse(
@@ -583,7 +694,8 @@ class EndpointHandler:
         file: UploadFile,
         sub_provider: Dict[str, Any]
     ) -> PrettyJSONResponse:
-        response = await self.api_client.make_request(
+        response = await self._make_request(
+            model=model,
             endpoint='audio/translations',
             method='POST',
             sub_provider=sub_provider,
@@ -597,12 +709,11 @@ class EndpointHandler:
                 response, False, sub_provider, request, model
             )
 
-        model_instance = Model.get_model(model)
-        request.state.user['credits'] -= model_instance.pricing.price
+        self._record_success(model)
 
-        await self.metrics_manager.user_manager.update_user(
-            request.state.user['user_id'],
-            request.state.user
+        model_instance = Model.get_model(model)
+        await self.metrics_manager.deduct_user_credits(
+            request, model_instance.pricing.price
         )
 
         return PrettyJSONResponse(
@@ -648,10 +759,7 @@ class OpenAI(BaseProvider):
         self.api_config = OpenAIConfig()
         self.user_manager = UserManager()
         self.provider_manager = ProviderManager()
-        self.sub_provider_manager = SubProviderManager(
-            AsyncIOMotorClient(settings.db_url),
-            self.config.name
-        )
+        self.sub_provider_manager = SubProviderManager(self.config.name)
         self.api_client = APIClient(self.api_config)
         self.response_handler = ResponseHandler(self.api_config)
         self.metrics_manager = MetricsManager(
@@ -674,8 +782,16 @@ class OpenAI(BaseProvider):
             self.config
         )
 
+    async def start(self) -> None:
+        await self.sub_provider_manager.start()
+
+    async def close(self) -> None:
+        await self.metrics_manager.drain()
+        await self.sub_provider_manager.stop()
+        await self.api_client.close()
+
     @classmethod
-    @ErrorHandler.retry_provider(max_retries=10)
+    @ErrorHandler.retry_provider(max_retries=10, hedged=True)
     async def chat_completions(
         cls,
         request: Request,
@@ -684,11 +800,14 @@ class OpenAI(BaseProvider):
         stream: bool,
         **kwargs
     ) -> Union[PrettyJSONResponse, StreamingResponse]:
-        instance = cls()
+        instance = cls.get_instance()
         start_time = time.time()
 
         try:
-            sub_provider = await instance.sub_provider_manager.get_available_provider(model)
+            sub_provider = await instance.sub_provider_manager.get_available_provider(
+                model,
+                request.state.token_count
+            )
             if not sub_provider:
                 return instance.response_handler.create_error_response(
                     message='No sub-providers were found for the specified model. Try again later.',
@@ -696,12 +815,6 @@ class OpenAI(BaseProvider):
                     error_type='sub_provider_error'
                 )
 
-            await instance.metrics_manager.update_user_credits(
-                request,
-                model,
-                request.state.token_count
-            )
-
             return await instance.endpoint_handler.handle_chat_completion(
                 request, model, messages, stream, sub_provider, start_time, **kwargs
             )
@@ -722,7 +835,7 @@ class OpenAI(BaseProvider):
         prompt: str,
         **_
     ) -> PrettyJSONResponse:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -753,7 +866,7 @@ class OpenAI(BaseProvider):
         input: Union[str, List[str], Iterable[int], Iterable[Iterable[int]]],
         **kwargs
     ) -> PrettyJSONResponse:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -783,7 +896,7 @@ class OpenAI(BaseProvider):
         model: str,
         input: Union[str, List[str]]
     ) -> PrettyJSONResponse:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -814,7 +927,7 @@ class OpenAI(BaseProvider):
         input: str,
         **kwargs
     ) -> Response:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -844,7 +957,7 @@ class OpenAI(BaseProvider):
         model: str,
         file: UploadFile
     ) -> PrettyJSONResponse:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -874,7 +987,7 @@ class OpenAI(BaseProvider):
         model: str,
         file: UploadFile
     ) -> PrettyJSONResponse:
-        instance = cls()
+        instance = cls.get_instance()
 
         try:
             sub_provider = await instance.sub_provider_manager.get_available_provider(model)
@@ -1,13 +1,18 @@
+import re
 import time
 import ujson
 import random
 import string
+import types
+import asyncio
 import functools
 import httpx
+from collections import deque
+from contextvars import ContextVar
 from dataclasses import dataclass
 from fastapi import Request
-from typing import List, Dict, Any, Callable, Coroutine, Optional
-from ..responses import StreamingResponseWithStatusCode
+from typing import List, Dict, Any, Callable, Coroutine, Optional, Tuple, Deque
+from ..responses import PeekableStreamingResponse, StreamingResponseWithStatusCode, pretty_json
 from ..providers import BaseProvider
 from ..core import ProviderManager, settings
 
@@ -18,33 +23,99 @@ class WebhookConfig:
     admin_id: str = '325699845031723010'
     error_alert: str = '⚠️ **Error Alert**'
 
+@dataclass
+class HedgingConfig:
+    default_delay: float = 3.0
+    min_delay: float = 0.5
+    max_delay: float = 10.0
+    percentile: float = 0.95
+    min_samples: int = 20
+    window_size: int = 200
+
+class TTFTTracker:
+    def __init__(self, config: Optional[HedgingConfig] = None):
+        self.config = config or HedgingConfig()
+        self.samples: Dict[Tuple[str, bool], Deque[float]] = {}
+
+    def record(self, key: Tuple[str, bool], elapsed: float) -> None:
+        self.samples.setdefault(key, deque(maxlen=self.config.window_size)).append(elapsed)
+
+    def get_deadline(self, key: Tuple[str, bool]) -> float:
+        samples = self.samples.get(key)
+        if not samples or len(samples) < self.config.min_samples:
+            return self.config.default_delay
+
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.config.percentile))]
+        return min(self.config.max_delay, max(self.config.min_delay, value))
+
+class DeferredBilling:
+    current: ContextVar[Optional['DeferredBilling']] = ContextVar('deferred_billing', default=None)
+
+    def __init__(self):
+        self.operations: List[Coroutine] = []
+        self.is_committed = False
+        self.is_cancelled = False
+
+    @classmethod
+    async def submit(cls, operation: Coroutine) -> None:
+        billing = cls.current.get()
+
+        if billing is None or billing.is_committed:
+            await operation
+        elif billing.is_cancelled:
+            operation.close()
+        else:
+            billing.operations.append(operation)
+
+    async def commit(self) -> None:
+        self.is_committed = True
+        operations, self.operations = self.operations, []
+
+        for operation in operations:
+            await operation
+
+    def cancel(self) -> None:
+        self.is_cancelled = True
+        operations, self.operations = self.operations, []
+
+        for operation in operations:
+            operation.close()
+
 class ErrorHandler:
+    ttft = TTFTTracker()
+
     def __init__(self):
         self.provider_manager = ProviderManager()
         self.excluded_providers = []
 
     @classmethod
-    def retry_provider(cls, max_retries: int) -> Callable:
+    def retry_provider(cls, max_retries: int, hedged: bool = False) -> Callable:
         def decorator(func: Callable[..., Coroutine]) -> Callable:
             @functools.wraps(func)
             async def wrapped(*args, **kwargs) -> Any:
                 instance = cls()
 
                 current_func = func
+                response = None
 
                 for attempt in range(max_retries):
                     try:
-                        response = await current_func(*args, **kwargs)
+                        if hedged and settings.hedged_requests and attempt == 0:
+                            next_response = await instance._run_hedged(
+                                current_func, args, kwargs
+                            )
+                        else:
+                            next_response = await current_func(*args, **kwargs)
                     except TypeError:
                         continue
 
-                    if isinstance(response, StreamingResponseWithStatusCode):
-                        first_chunk, status_code = await response.body_iterator.__anext__()
-                        if status_code == 200:
-                            return await instance._wrap_streaming_response(
-                                response, first_chunk, status_code
-                            )
-                    elif getattr(response, 'status_code', 0) == 200:
+                    if isinstance(response, PeekableStreamingResponse):
+                        await response.discard()
+
+                    response = next_response
+
+                    if await instance._is_successful(response):
                         return response
 
                     if attempt == 2:
@@ -65,6 +136,131 @@ class ErrorHandler:
             return wrapped
         return decorator
 
+    @staticmethod
+    async def _is_successful(response: Any) -> bool:
+        if isinstance(response, StreamingResponseWithStatusCode):
+            first_chunk = await response.peek()
+            return bool(first_chunk) and first_chunk[1] == 200
+
+        if isinstance(response, PeekableStreamingResponse):
+            return response.status_code == 200 and await response.peek() is not None
+
+        return getattr(response, 'status_code', 0) == 200
+
+    @staticmethod
+    async def _discard_response(response: Any, billing: DeferredBilling) -> None:
+        billing.cancel()
+
+        if not isinstance(response, PeekableStreamingResponse):
+            return
+
+        token = DeferredBilling.current.set(billing)
+        try:
+            await response.discard()
+        finally:
+            DeferredBilling.current.reset(token)
+
+    async def _run_attempt(
+        self,
+        func: Callable[..., Coroutine],
+        args: tuple,
+        kwargs: dict,
+        billing: DeferredBilling
+    ) -> Tuple[Any, bool]:
+        DeferredBilling.current.set(billing)
+        response = await func(*args, **kwargs)
+
+        try:
+            return response, await self._is_successful(response)
+        except asyncio.CancelledError:
+            await self._discard_response(response, billing)
+            raise
+
+    async def _run_hedged(
+        self,
+        func: Callable[..., Coroutine],
+        args: tuple,
+        kwargs: dict
+    ) -> Any:
+        key = (kwargs.get('model'), bool(kwargs.get('stream')))
+        attempts: Dict[asyncio.Task, Tuple[DeferredBilling, float]] = {}
+
+        def start_attempt(attempt_func: Callable[..., Coroutine], attempt_args: tuple) -> None:
+            billing = DeferredBilling()
+            task = asyncio.create_task(
+                self._run_attempt(attempt_func, attempt_args, kwargs, billing)
+            )
+            attempts[task] = (billing, time.monotonic())
+
+        start_attempt(func, args)
+        done, pending = await asyncio.wait(
+            set(attempts),
+            timeout=self.ttft.get_deadline(key)
+        )
+
+        if not done:
+            primary_provider = func.__qualname__.split('.')[0]
+            hedge_func = await self._get_alternative_provider(
+                func,
+                args,
+                kwargs,
+                self.excluded_providers + [primary_provider]
+            )
+            if hedge_func:
+                start_attempt(hedge_func, args[1:])
+            pending = set(attempts)
+
+        winner: Optional[asyncio.Task] = None
+        fallback: Optional[asyncio.Task] = None
+        completed: List[asyncio.Task] = list(done)
+
+        try:
+            while winner is None:
+                for task in completed:
+                    if task.exception():
+                        continue
+
+                    _, successful = task.result()
+                    if successful and winner is None:
+                        winner = task
+                    elif fallback is None:
+                        fallback = task
+
+                if winner is not None or not pending:
+                    break
+
+                completed, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+        except asyncio.CancelledError:
+            winner = fallback = None
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+            result = winner or fallback
+            for task, (billing, _) in attempts.items():
+                if task is result:
+                    continue
+                if task.done() and not task.cancelled() and not task.exception():
+                    await self._discard_response(task.result()[0], billing)
+                else:
+                    billing.cancel()
+
+        if result is None:
+            return next(iter(attempts)).result()[0]
+
+        billing, started_at = attempts[result]
+        await billing.commit()
+
+        if result is winner:
+            self.ttft.record(key, time.monotonic() - started_at)
+
+        return result.result()[0]
+
     def _requires_vision(self, messages: Optional[List[Dict[str, Any]]]) -> bool:
         if not messages:
             return False
@@ -79,13 +275,18 @@ class ErrorHandler:
         self,
         current_func: Callable,
         args: tuple,
-        kwargs: dict
+        kwargs: dict,
+        excluded_providers: Optional[List[str]] = None
     ) -> Optional[Callable]:
         provider = await self.provider_manager.get_best_provider(
             model=kwargs.get('model'),
             vision=self._requires_vision(kwargs.get('messages')),
             tools=kwargs.get('tools', False),
-            excluded_providers=self.excluded_providers
+            excluded_providers=(
+                self.excluded_providers
+                if excluded_providers is None
+                else excluded_providers
+            )
         )
 
         if not provider:
@@ -96,23 +297,13 @@ class ErrorHandler:
         if not provider_class:
             return None
 
-        return getattr(provider_class, current_func.__name__)
+        method = getattr(provider_class, current_func.__name__)
+        func = getattr(method, '__func__', method)
 
-    async def _wrap_streaming_response(
-        self,
-        response: StreamingResponseWithStatusCode,
-        first_chunk: str,
-        status_code: int
-    ) -> StreamingResponseWithStatusCode:
-        async def iterator():
-            yield first_chunk, status_code
-            async for chunk, status in response.body_iterator:
-                yield chunk, status
-    
-        return StreamingResponseWithStatusCode(
-            content=iterator(),
-            media_type='text/event-stream'
-        )
+        if not hasattr(func, '__wrapped__'):
+            return method
+
+        return types.MethodType(func.__wrapped__, provider_class)
 
 class MessageFormatter:
     @staticmethod
@@ -174,7 +365,7 @@ class ResponseGenerator:
 
     @staticmethod
     def _serialize_json(obj: Dict[str, Any], indented: bool = True) -> str:
-        if indented:
+        if indented and pretty_json.get():
             return ujson.dumps(
                 obj=obj,
                 ensure_ascii=False,
@@ -191,6 +382,45 @@ class ResponseGenerator:
             escape_forward_slashes=False
         )
 
+class StreamChunkRelay:
+    DELTA_CONTENT_PATTERN = re.compile(r'"content"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+    USAGE_PATTERN = re.compile(r'"usage"\s*:\s*\{')
+
+    def __init__(self, provider_id: str):
+        self.provider_prefix = f'{{"provider_id":{ujson.dumps(provider_id)},'
+
+    def relay(self, payload: str) -> str:
+        payload = payload.strip()
+
+        if not payload.startswith('{'):
+            return f'data: {payload}\n\n'
+
+        if payload[1:].lstrip().startswith('}'):
+            return f'data: {self.provider_prefix[:-1]}}}\n\n'
+
+        return f'data: {self.provider_prefix}{payload[1:]}\n\n'
+
+    @classmethod
+    def extract_content(cls, payload: str) -> str:
+        parts = []
+
+        for match in cls.DELTA_CONTENT_PATTERN.finditer(payload):
+            content = match.group(1)
+            parts.append(ujson.loads(f'"{content}"') if '\\' in content else content)
+
+        return ''.join(parts)
+
+    @classmethod
+    def extract_usage(cls, payload: str) -> Optional[Dict[str, Any]]:
+        if not cls.USAGE_PATTERN.search(payload):
+            return None
+
+        chunk = ujson.loads(payload)
+        return {
+            'usage': chunk.get('usage') or {},
+            'has_choices': bool(chunk.get('choices'))
+        }
+
 class IDGenerator:
     COMPLETION_PREFIX = 'chatcmpl-A'
     FINGERPRINT_PREFIX = 'fp_'
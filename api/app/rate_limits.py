@@ -0,0 +1,159 @@
+import math
+import time
+import yaml
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+from limits import RateLimitItem, RateLimitItemPerMinute, parse_many
+from limits.aio.strategies import STRATEGIES, RateLimiter
+from limits.storage import storage_from_string
+from .core import settings
+
+@dataclass
+class RateLimitConfig:
+    default_tier: int = 0
+    tier_limits: Dict[int, str] = field(default_factory=lambda: {
+        0: '2/second;30/minute',
+        1: '3/second;60/minute',
+        2: '5/second;120/minute',
+        3: '10/second;300/minute',
+        4: '20/second;600/minute',
+        5: '50/second;1500/minute'
+    })
+
+    def get_limits(self, tier: int) -> str:
+        return self.tier_limits.get(tier, self.tier_limits[self.default_tier])
+
+@dataclass
+class UsageLimitConfig:
+    credits_file: str = 'credits.yml'
+    credits_window_minutes: int = 60
+    min_tokens_per_minute: int = 32000
+    storage_recheck_seconds: float = 30.0
+
+class UsageRateLimiter:
+    def __init__(
+        self,
+        config: Optional[UsageLimitConfig] = None,
+        rate_limit_config: Optional[RateLimitConfig] = None
+    ):
+        self.config = config or UsageLimitConfig()
+        self.rate_limit_config = rate_limit_config or RateLimitConfig()
+        self.credits_tiers = self._load_credits_tiers()
+        self.limiter = self._create_limiter(settings.rate_limit_storage_uri)
+        self.fallback_limiter = (
+            self._create_limiter('memory://')
+            if settings.rate_limit_storage_uri != 'memory://'
+            else None
+        )
+        self.storage_healthy = True
+        self.storage_retry_at = 0.0
+        self.request_limits: Dict[int, List[RateLimitItem]] = {}
+        self.token_limits: Dict[int, RateLimitItem] = {}
+
+    @staticmethod
+    def _create_limiter(storage_uri: str) -> RateLimiter:
+        if not storage_uri.startswith('async+'):
+            storage_uri = f'async+{storage_uri}'
+        return STRATEGIES[settings.rate_limit_strategy](storage_from_string(storage_uri))
+
+    def _load_credits_tiers(self) -> Dict[int, int]:
+        try:
+            with Path(self.config.credits_file).open() as f:
+                return yaml.safe_load(f) or {}
+        except Exception as e:
+            print(f'Failed to load credits tiers for rate limiting: {str(e)}')
+            return {}
+
+    def get_tier(self, user: Dict[str, Any]) -> int:
+        return user.get('premium_tier', self.rate_limit_config.default_tier)
+
+    def get_request_limits(self, tier: int) -> List[RateLimitItem]:
+        if tier not in self.request_limits:
+            self.request_limits[tier] = parse_many(self.rate_limit_config.get_limits(tier))
+        return self.request_limits[tier]
+
+    def get_tokens_per_minute(self, tier: int) -> int:
+        daily_credits = self.credits_tiers.get(tier, 0)
+        return max(
+            self.config.min_tokens_per_minute,
+            daily_credits // self.config.credits_window_minutes
+        )
+
+    def get_token_limit(self, tier: int) -> RateLimitItem:
+        if tier not in self.token_limits:
+            self.token_limits[tier] = RateLimitItemPerMinute(self.get_tokens_per_minute(tier))
+        return self.token_limits[tier]
+
+    async def _get_retry_after(
+        self,
+        limiter: RateLimiter,
+        item: RateLimitItem,
+        *identifiers: str
+    ) -> int:
+        reset_time, _ = await limiter.get_window_stats(item, *identifiers)
+        return max(1, math.ceil(reset_time - time.time()))
+
+    def _mark_storage_unavailable(self, error: Exception) -> None:
+        self.storage_retry_at = time.monotonic() + self.config.storage_recheck_seconds
+
+        if self.storage_healthy:
+            self.storage_healthy = False
+            print(f'Rate limit storage unavailable, using in-memory limits: {str(error)}')
+
+    async def _get_limiter(self) -> RateLimiter:
+        if self.storage_healthy or self.fallback_limiter is None:
+            return self.limiter
+
+        if time.monotonic() < self.storage_retry_at:
+            return self.fallback_limiter
+
+        self.storage_retry_at = time.monotonic() + self.config.storage_recheck_seconds
+
+        try:
+            available = await self.limiter.storage.check()
+        except Exception:
+            available = False
+
+        if not available:
+            return self.fallback_limiter
+
+        self.storage_healthy = True
+        print('Rate limit storage recovered')
+        return self.limiter
+
+    async def _hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> Optional[int]:
+        limiter = await self._get_limiter()
+
+        try:
+            if await limiter.hit(item, *identifiers, cost=cost):
+                return None
+            return await self._get_retry_after(limiter, item, *identifiers)
+        except Exception as e:
+            if limiter is not self.limiter or self.fallback_limiter is None:
+                print(f'Rate limit storage unavailable: {str(e)}')
+                return None
+
+            self._mark_storage_unavailable(e)
+            return await self._hit(item, *identifiers, cost=cost)
+
+    async def hit_request(self, user: Dict[str, Any]) -> Optional[int]:
+        identifiers = ('requests', str(user['user_id']))
+
+        for item in self.get_request_limits(self.get_tier(user)):
+            retry_after = await self._hit(item, *identifiers)
+            if retry_after is not None:
+                return retry_after
+
+        return None
+
+    async def hit_tokens(self, user: Dict[str, Any], token_count: int) -> Optional[int]:
+        item = self.get_token_limit(self.get_tier(user))
+        return await self._hit(
+            item,
+            'tokens',
+            str(user['user_id']),
+            cost=max(1, min(token_count, item.amount))
+        )
+
+usage_rate_limiter = UsageRateLimiter()
@@ -1,9 +1,14 @@
 import ujson
+import orjson
+from contextvars import ContextVar
 from dataclasses import dataclass
+from urllib.parse import parse_qsl
 from fastapi.responses import StreamingResponse, Response
-from starlette.types import Send
+from starlette.types import ASGIApp, Receive, Scope, Send
 from typing import Union, Dict, Any, Tuple, AsyncGenerator, Optional
 
+pretty_json: ContextVar[bool] = ContextVar('pretty_json', default=True)
+
 @dataclass
 class ResponseConfig:
     charset: str = 'utf-8'
@@ -78,10 +83,10 @@ class StreamResponseHandler:
         }
         return ujson.dumps(obj=error_obj, indent=4)
 
-class StreamingResponseWithStatusCode(StreamingResponse):
+class PeekableStreamingResponse(StreamingResponse):
     def __init__(
         self,
-        content: AsyncGenerator[Tuple[str, int], None],
+        content: AsyncGenerator[Any, None],
         status_code: int = 200,
         headers: Optional[Dict[str, str]] = None,
         media_type: Optional[str] = None,
@@ -94,46 +99,127 @@ class StreamingResponseWithStatusCode(StreamingResponse):
             media_type=media_type,
             background=background
         )
-        self.handler = StreamResponseHandler()
+        self.first_chunk: Optional[Any] = None
+        self.is_exhausted = False
+
+    async def peek(self) -> Optional[Any]:
+        if self.first_chunk is None and not self.is_exhausted:
+            try:
+                self.first_chunk = await self.body_iterator.__anext__()
+            except StopAsyncIteration:
+                self.is_exhausted = True
+
+        return self.first_chunk
+
+    async def discard(self) -> None:
+        self.is_exhausted = True
+        aclose = getattr(self.body_iterator, 'aclose', None)
 
-    async def stream_response(self, send: Send) -> None:
         try:
-            first_chunk_content, self.status_code = await self.body_iterator.__anext__()
+            if aclose:
+                await aclose()
+        finally:
+            if self.background:
+                await self.background()
 
-            self.raw_headers = self.handler._update_headers_for_error(
-                self.raw_headers,
-                self.status_code
-            )
+    def _encode_chunk(self, chunk: Union[str, bytes]) -> bytes:
+        if isinstance(chunk, (bytes, memoryview)):
+            return chunk
+        return chunk.encode(self.charset)
 
-            await self.handler._send_response_start(
-                send,
-                self.status_code,
-                self.raw_headers
-            )
+    async def stream_response(self, send: Send) -> None:
+        first_chunk = await self.peek()
 
-            await self.handler._send_chunk(send, first_chunk_content)
+        await send({
+            'type': 'http.response.start',
+            'status': self.status_code,
+            'headers': self.raw_headers
+        })
 
-            async for chunk_content, chunk_status in self.body_iterator:
-                if not self.handler._is_success_status(chunk_status):
-                    self.status_code = chunk_status
-                    await self.handler._send_chunk(send, '', False)
-                    return
+        if first_chunk is not None:
+            await send({
+                'type': 'http.response.body',
+                'body': self._encode_chunk(first_chunk),
+                'more_body': True
+            })
 
-                await self.handler._send_chunk(send, chunk_content)
+            async for chunk in self.body_iterator:
+                await send({
+                    'type': 'http.response.body',
+                    'body': self._encode_chunk(chunk),
+                    'more_body': True
+                })
 
-            await self.handler._send_chunk(send, '', False)
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+class StreamingResponseWithStatusCode(PeekableStreamingResponse):
+    def __init__(
+        self,
+        content: AsyncGenerator[Tuple[str, int], None],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[Any] = None,
+    ):
+        super().__init__(
+            content=content,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            background=background
+        )
+        self.handler = StreamResponseHandler()
+
+    async def stream_response(self, send: Send) -> None:
+        first_chunk = await self.peek()
 
-        except StopAsyncIteration:
+        if first_chunk is None:
             self.raw_headers = self.handler._update_headers_for_error(
                 self.raw_headers,
                 500
             )
 
             await self.handler._send_response_start(send, 500, self.raw_headers)
-            
+
             error_content = self.handler._create_error_response()
             await self.handler._send_chunk(send, error_content)
             await self.handler._send_chunk(send, '', False)
+            return
+
+        first_chunk_content, self.status_code = first_chunk
+
+        self.raw_headers = self.handler._update_headers_for_error(
+            self.raw_headers,
+            self.status_code
+        )
+
+        await self.handler._send_response_start(
+            send,
+            self.status_code,
+            self.raw_headers
+        )
+
+        await self.handler._send_chunk(send, first_chunk_content)
+
+        async for chunk_content, chunk_status in self.body_iterator:
+            if not self.handler._is_success_status(chunk_status):
+                self.status_code = chunk_status
+                await self.handler._send_chunk(send, '', False)
+                return
+
+            await self.handler._send_chunk(send, chunk_content)
+
+        await self.handler._send_chunk(send, '', False)
+
+class CompactJSONResponse(Response):
+    media_type = 'application/json'
+
+    @staticmethod
+    def _serialize_json(content: Union[list, dict]) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+    def render(self, content: Union[list, dict]) -> bytes:
+        return self._serialize_json(content)
 
 class PrettyJSONResponse(Response):
     media_type = 'application/json'
@@ -149,5 +235,52 @@ class PrettyJSONResponse(Response):
             escape_forward_slashes=False
         )
 
+    @classmethod
+    def encode(cls, content: Union[list, dict]) -> bytes:
+        if not pretty_json.get():
+            return CompactJSONResponse._serialize_json(content)
+        return cls._serialize_json(content).encode('utf-8')
+
     def render(self, content: Union[list, dict]) -> bytes:
-        return self._serialize_json(content).encode('utf-8')
\ No newline at end of file
+        return self.encode(content)
+
+class JSONFormatMiddleware:
+    def __init__(self, app: ASGIApp, pretty: bool = True):
+        self.app = app
+        self.pretty = pretty
+
+    @staticmethod
+    def _parse_flag(value: str) -> Optional[bool]:
+        value = value.strip().strip('"').lower()
+        if value in ['true', '1', 'yes']:
+            return True
+        if value in ['false', '0', 'no']:
+            return False
+        return None
+
+    def _is_pretty(self, scope: Scope) -> bool:
+        for key, value in parse_qsl(scope.get('query_string', b'').decode('latin-1')):
+            if key == 'pretty' and (flag := self._parse_flag(value)) is not None:
+                return flag
+
+        for name, value in scope.get('headers', []):
+            if name != b'accept':
+                continue
+
+            for param in value.decode('latin-1').split(';')[1:]:
+                key, _, param_value = param.partition('=')
+                if key.strip().lower() == 'pretty' and (flag := self._parse_flag(param_value)) is not None:
+                    return flag
+
+        return self.pretty
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        token = pretty_json.set(self._is_pretty(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pretty_json.reset(token)
@@ -4,8 +4,13 @@ import yaml
 from pathlib import Path
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
-from .core import settings
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import OperationFailure
+from .core import DatabaseClient, UserManager, ProviderManager
+
+@dataclass
+class UserCacheConfig:
+    retry_interval: int = 60
 
 @dataclass
 class CreditsConfig:
@@ -52,17 +57,17 @@ class CreditsManager:
             if user['credits'] >= self.config.max_credits:
                 return
             
-            new_credits = user['credits'] + self.credits_tiers[user['premium_tier']]
-
             await self.db.update_one(
-                {'user_id': user['user_id']},
                 {
-                    '$set': {
-                        'credits': new_credits,
-                        'last_daily': time.time()
-                    }
+                    'user_id': user['user_id'],
+                    'last_daily': user['last_daily']
+                },
+                {
+                    '$inc': {'credits': self.credits_tiers[user['premium_tier']]},
+                    '$set': {'last_daily': time.time()}
                 }
             )
+            UserManager.cache.invalidate(user_id=user['user_id'])
 
         except Exception as e:
             print(f'Failed to update credits for user {user["user_id"]}: {str(e)}')
@@ -87,12 +92,17 @@ class CreditsManager:
 
 class CreditsService:
     def __init__(self):
-        self.db = AsyncIOMotorClient(settings.db_url)['db']['users']
         self.config = CreditsConfig()
-        self.manager = CreditsManager(self.db, self.config)
+        self.manager: Optional[CreditsManager] = None
         self.task: Optional[asyncio.Task] = None
 
     async def start(self) -> None:
+        if not self.manager:
+            self.manager = CreditsManager(
+                DatabaseClient.get_collection('users'),
+                self.config
+            )
+
         if not self.task or self.task.done():
             self.task = asyncio.create_task(
                 self.manager.start_credits_service()
@@ -104,4 +114,109 @@ class CreditsService:
             try:
                 await self.task
             except asyncio.CancelledError:
-                pass
\ No newline at end of file
+                pass
+
+class UserCacheService:
+    def __init__(self):
+        self.config = UserCacheConfig()
+        self.task: Optional[asyncio.Task] = None
+
+    def _handle_change(self, change: Dict[str, Any]) -> None:
+        if change['operationType'] in ['drop', 'rename', 'dropDatabase', 'invalidate']:
+            UserManager.cache.clear()
+            return
+
+        if 'documentKey' not in change:
+            return
+
+        document_id = change['documentKey']['_id']
+        description = change.get('updateDescription') or {}
+        updated_fields = description.get('updatedFields') or {}
+
+        is_patchable = (
+            change['operationType'] == 'update' and
+            not description.get('removedFields') and
+            'key' not in updated_fields and
+            not any('.' in field for field in updated_fields)
+        )
+
+        if is_patchable:
+            UserManager.cache.update(updated_fields, document_id=document_id)
+        else:
+            UserManager.cache.invalidate(document_id=document_id)
+
+    async def watch_user_changes(self) -> None:
+        while True:
+            try:
+                async with DatabaseClient.get_collection('users').watch() as stream:
+                    async for change in stream:
+                        self._handle_change(change)
+            except asyncio.CancelledError:
+                break
+            except OperationFailure as e:
+                print(f'User change stream unavailable, relying on cache TTL: {str(e)}')
+                break
+            except Exception as e:
+                print(f'User cache service error: {str(e)}')
+                UserManager.cache.clear()
+                await asyncio.sleep(self.config.retry_interval)
+
+    async def start(self) -> None:
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.watch_user_changes())
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+class ProviderMetricsService:
+    def __init__(self):
+        self.aggregator = ProviderManager.metrics
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.aggregator.run())
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        await self.aggregator.flush()
+
+class ProviderRoutingService:
+    def __init__(self):
+        self.provider_manager = ProviderManager()
+        self.config = ProviderManager.routing.config
+        self.task: Optional[asyncio.Task] = None
+
+    async def refresh_routes(self) -> None:
+        while True:
+            try:
+                await self.provider_manager.refresh_routing_table()
+                await asyncio.sleep(self.config.refresh_interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f'Provider routing service error: {str(e)}')
+                await asyncio.sleep(self.config.refresh_interval)
+
+    async def start(self) -> None:
+        if not self.task or self.task.done():
+            self.task = asyncio.create_task(self.refresh_routes())
+
+    async def stop(self) -> None:
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
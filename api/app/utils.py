@@ -1,51 +1,388 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import math
+import struct
 import tiktoken
 import importlib
 import inspect
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, APIRouter, Request
 from pathlib import Path
-from typing import Union, List, Optional
+from typing import Union, List, Optional, ClassVar, Dict, Tuple
 from dataclasses import dataclass
 from .models import ChatRequest, Message, TextContentPart, ImageContentPart
+from .providers import ModelRegistry
 
 @dataclass
 class TokenizerConfig:
     encoding_name: str = 'o200k_base'
-    non_text_token_count: int = 100
+    cache_size: int = 4096
+    cache_min_length: int = 256
+    offload_threshold: int = 16384
+    max_workers: int = 4
+    image_base_tokens: int = 85
+    image_tile_tokens: int = 170
+    image_tile_size: int = 512
+    image_max_size: int = 2048
+    image_short_side: int = 768
+    image_default_width: int = 1024
+    image_default_height: int = 1024
+    image_header_bytes: int = 65536
+
+class ImageTokenEstimator:
+    def __init__(self, config: TokenizerConfig):
+        self.config = config
+
+    @staticmethod
+    def _read_jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+        index = 2
+
+        while index + 9 < len(data):
+            if data[index] != 0xFF:
+                index += 1
+                continue
+
+            marker = data[index + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                index += 1 if marker == 0xFF else 2
+                continue
+
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[index + 5:index + 9])
+                return width, height
+
+            index += 2 + struct.unpack('>H', data[index + 2:index + 4])[0]
+
+        return None
+
+    @classmethod
+    def read_image_size(cls, data: bytes) -> Optional[Tuple[int, int]]:
+        try:
+            if data.startswith(b'\x89PNG\r\n\x1a\n'):
+                return struct.unpack('>II', data[16:24])
+            if data.startswith((b'GIF87a', b'GIF89a')):
+                return struct.unpack('<HH', data[6:10])
+            if data.startswith(b'\xff\xd8'):
+                return cls._read_jpeg_size(data)
+            if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+                chunk = data[12:16]
+                if chunk == b'VP8X':
+                    return (
+                        int.from_bytes(data[24:27], 'little') + 1,
+                        int.from_bytes(data[27:30], 'little') + 1
+                    )
+                if chunk == b'VP8 ':
+                    width, height = struct.unpack('<HH', data[26:30])
+                    return width & 0x3FFF, height & 0x3FFF
+                if chunk == b'VP8L':
+                    bits = int.from_bytes(data[21:25], 'little')
+                    return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        except struct.error:
+            return None
+
+        return None
+
+    def get_image_size(self, url: str) -> Tuple[int, int]:
+        if url.startswith('data:'):
+            header, _, payload = url.partition(',')
+
+            if header.endswith(';base64'):
+                prefix_length = self.config.image_header_bytes // 3 * 4
+                try:
+                    size = self.read_image_size(
+                        base64.b64decode(payload[:prefix_length])
+                    )
+                except (binascii.Error, ValueError):
+                    size = None
+
+                if size and all(size):
+                    return size
+
+        return self.config.image_default_width, self.config.image_default_height
+
+    def count_image_tokens(self, url: str, detail: str = 'auto') -> int:
+        if detail == 'low':
+            return self.config.image_base_tokens
+
+        width, height = self.get_image_size(url)
+
+        scale = min(1, self.config.image_max_size / max(width, height))
+        width, height = width * scale, height * scale
+
+        scale = min(1, self.config.image_short_side / min(width, height))
+        width, height = width * scale, height * scale
+
+        tiles = (
+            math.ceil(width / self.config.image_tile_size) *
+            math.ceil(height / self.config.image_tile_size)
+        )
+
+        return self.config.image_base_tokens + self.config.image_tile_tokens * tiles
+
+class TokenCountCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[Tuple[str, bytes], int] = OrderedDict()
+
+    @staticmethod
+    def create_key(encoding_name: str, text: str) -> Tuple[str, bytes]:
+        return encoding_name, hashlib.blake2b(
+            text.encode('utf-8', 'surrogatepass'),
+            digest_size=16
+        ).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[int]:
+        token_count = self.entries.get(key)
+        if token_count is not None:
+            self.entries.move_to_end(key)
+        return token_count
+
+    def set(self, key: Tuple[str, bytes], token_count: int) -> None:
+        self.entries[key] = token_count
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+class EncoderCache:
+    encoders: ClassVar[Dict[str, tiktoken.Encoding]] = {}
+    lock: ClassVar[threading.Lock] = threading.Lock()
+    cache_dir: ClassVar[Optional[str]] = None
+
+    @classmethod
+    def configure(cls, cache_dir: Optional[str]) -> None:
+        if not cache_dir:
+            return
+
+        cls.cache_dir = str(Path(cache_dir).expanduser().resolve())
+        os.environ['TIKTOKEN_CACHE_DIR'] = cls.cache_dir
+
+    @classmethod
+    def get(cls, encoding_name: str) -> tiktoken.Encoding:
+        encoder = cls.encoders.get(encoding_name)
+        if encoder is not None:
+            return encoder
+
+        with cls.lock:
+            encoder = cls.encoders.get(encoding_name)
+            if encoder is None:
+                encoder = cls.encoders[encoding_name] = tiktoken.get_encoding(encoding_name)
+
+        return encoder
+
+    @classmethod
+    async def warm(cls, encoding_names: List[str]) -> None:
+        for encoding_name in encoding_names:
+            try:
+                await asyncio.to_thread(cls.get, encoding_name)
+            except Exception as e:
+                print(f'Failed to load tokenizer {encoding_name}: {str(e)}')
 
 class TokenCounter:
+    cache: ClassVar[Optional[TokenCountCache]] = None
+    executor: ClassVar[Optional[ThreadPoolExecutor]] = None
+    model_encodings: ClassVar[Dict[str, str]] = {}
+
     def __init__(self, config: Optional[TokenizerConfig] = None):
         self.config = config or TokenizerConfig()
-        self.encoding = tiktoken.get_encoding(self.config.encoding_name)
+        self.image_estimator = ImageTokenEstimator(self.config)
+
+        if TokenCounter.cache is None:
+            TokenCounter.cache = TokenCountCache(self.config.cache_size)
+
+    @classmethod
+    def _get_executor(cls, max_workers: int) -> ThreadPoolExecutor:
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='tokenizer'
+            )
+        return cls.executor
+
+    def get_encoding_name(self, model: Optional[str] = None) -> str:
+        if not model:
+            return self.config.encoding_name
+
+        encoding_name = self.model_encodings.get(model)
+        if encoding_name is not None:
+            return encoding_name
+
+        model_instance = ModelRegistry.get(model)
+        if not model_instance:
+            return self.config.encoding_name
+
+        encoding_name = model_instance.tokenizer
+        if not encoding_name and model_instance.owned_by == 'openai':
+            try:
+                encoding_name = tiktoken.encoding_name_for_model(model_instance.id)
+            except KeyError:
+                pass
+
+        encoding_name = self.model_encodings[model] = encoding_name or self.config.encoding_name
+        return encoding_name
+
+    def _encode_count(self, text: str, encoding_name: str) -> int:
+        return len(EncoderCache.get(encoding_name).encode(text, disallowed_special=()))
+
+    def _count_texts(self, texts: List[str], encoding_name: str) -> List[int]:
+        return [self._encode_count(text, encoding_name) for text in texts]
+
+    def count_text_tokens(self, text: str, model: Optional[str] = None) -> int:
+        return self._encode_count(text, self.get_encoding_name(model))
+
+    def count_image_tokens(self, part: ImageContentPart) -> int:
+        return self.image_estimator.count_image_tokens(
+            part.image_url.url,
+            part.image_url.detail
+        )
 
     def count_message_content_tokens(
         self,
-        content: Union[str, List[Union[TextContentPart, ImageContentPart]]]
+        content: Union[str, List[Union[TextContentPart, ImageContentPart]]],
+        model: Optional[str] = None
     ) -> int:
         if isinstance(content, str):
-            return len(self.encoding.encode(content))
+            return self.count_text_tokens(content, model)
 
         return sum(
-            len(self.encoding.encode(part.text))
+            self.count_text_tokens(part.text, model)
             if part.type == 'text'
-            else self.config.non_text_token_count
+            else self.count_image_tokens(part)
             for part in content
         )
 
-    def count_message_tokens(self, message: Optional[Union[Message, str]]) -> int:
+    def count_message_tokens(
+        self,
+        message: Optional[Union[Message, str]],
+        model: Optional[str] = None
+    ) -> int:
         if not message:
             return 0
 
         if isinstance(message, str):
-            return len(self.encoding.encode(message))
+            return self.count_text_tokens(message, model)
 
-        return self.count_message_content_tokens(message.content)
+        return self.count_message_content_tokens(message.content, model)
 
     def count_request_tokens(self, data: ChatRequest) -> int:
         return sum(
-            self.count_message_tokens(msg)
+            self.count_message_tokens(msg, data.model)
             for msg in data.messages
         )
 
+    def _collect_request_texts(self, data: ChatRequest) -> Tuple[List[str], int]:
+        texts = []
+        image_tokens = 0
+
+        for message in data.messages:
+            if isinstance(message.content, str):
+                texts.append(message.content)
+                continue
+
+            for part in message.content:
+                if part.type == 'text':
+                    texts.append(part.text)
+                else:
+                    image_tokens += self.count_image_tokens(part)
+
+        return texts, image_tokens
+
+    async def count_request_tokens_async(self, data: ChatRequest) -> int:
+        encoding_name = self.get_encoding_name(data.model)
+        texts, token_count = self._collect_request_texts(data)
+        offloaded: List[Tuple[Tuple[str, bytes], str]] = []
+
+        for text in texts:
+            if len(text) < self.config.cache_min_length:
+                token_count += self._encode_count(text, encoding_name)
+                continue
+
+            key = self.cache.create_key(encoding_name, text)
+            cached_count = self.cache.get(key)
+
+            if cached_count is not None:
+                token_count += cached_count
+            elif len(text) >= self.config.offload_threshold:
+                offloaded.append((key, text))
+            else:
+                text_tokens = self._encode_count(text, encoding_name)
+                self.cache.set(key, text_tokens)
+                token_count += text_tokens
+
+        if offloaded:
+            unique_texts = dict(offloaded)
+            counts = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(self.config.max_workers),
+                self._count_texts,
+                list(unique_texts.values()),
+                encoding_name
+            )
+            counted = dict(zip(unique_texts.keys(), counts))
+
+            for key, text_tokens in counted.items():
+                self.cache.set(key, text_tokens)
+
+            token_count += sum(counted[key] for key, _ in offloaded)
+
+        return token_count
+
+class StreamTokenCounter:
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        model: Optional[str] = None,
+        max_buffer_size: int = 4096
+    ):
+        self.token_counter = token_counter
+        self.model = model
+        self.max_buffer_size = max_buffer_size
+        self.buffer: List[str] = []
+        self.buffer_size = 0
+        self.counted_tokens = 0
+        self.usage_tokens: Optional[int] = None
+
+    def add_text(self, text: str) -> int:
+        if not text:
+            return 0
+
+        self.buffer.append(text)
+        self.buffer_size += len(text)
+
+        if self.buffer_size < self.max_buffer_size:
+            return 0
+
+        buffered_text = ''.join(self.buffer)
+        split_index = max(buffered_text.rfind(' '), buffered_text.rfind('\n'))
+
+        if split_index <= 0:
+            return self._drain(buffered_text, '')
+
+        return self._drain(buffered_text[:split_index], buffered_text[split_index:])
+
+    def set_usage(self, completion_tokens: int) -> None:
+        self.usage_tokens = completion_tokens
+
+    def finish(self) -> int:
+        if self.usage_tokens is not None:
+            remaining_tokens = self.usage_tokens - self.counted_tokens
+            self.buffer, self.buffer_size = [], 0
+            self.counted_tokens = self.usage_tokens
+            return remaining_tokens
+
+        return self._drain(''.join(self.buffer), '')
+
+    def _drain(self, text: str, remainder: str) -> int:
+        token_count = self.token_counter.count_message_tokens(text, self.model) if text else 0
+        self.buffer = [remainder] if remainder else []
+        self.buffer_size = len(remainder)
+        self.counted_tokens += token_count
+        return token_count
+
 class APIKeyExtractor:
     def __init__(self, config: Optional[TokenizerConfig] = None):
         self.config = config or TokenizerConfig()
@@ -75,14 +412,29 @@ class RequestProcessor:
         self.token_counter = token_counter or TokenCounter(self.config)
         self.key_extractor = key_extractor or APIKeyExtractor(self.config)
 
-    def count_tokens(self, data: Union[ChatRequest, str]) -> int:
+    def count_tokens(
+        self,
+        data: Union[ChatRequest, str],
+        model: Optional[str] = None
+    ) -> int:
         if isinstance(data, ChatRequest):
             return self.token_counter.count_request_tokens(data)
-        return self.token_counter.count_message_tokens(data)
+        return self.token_counter.count_message_tokens(data, model)
+
+    async def count_tokens_async(
+        self,
+        data: Union[ChatRequest, str],
+        model: Optional[str] = None
+    ) -> int:
+        if isinstance(data, ChatRequest):
+            return await self.token_counter.count_request_tokens_async(data)
+        return self.token_counter.count_message_tokens(data, model)
 
     def get_api_key(self, request: Request) -> str:
         return self.key_extractor.extract_api_key(request)
 
+request_processor = RequestProcessor()
+
 class RouteLoader:
     @staticmethod
     def load(app: FastAPI, base_dir: str):
@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerRegistry,
+    CircuitState
+)
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker(CircuitBreakerConfig(min_requests=2, **kwargs))
+
+def trip(breaker: CircuitBreaker, now: float = 0.0) -> None:
+    for _ in range(breaker.config.min_requests):
+        breaker.record(now, breaker.try_acquire(now), True)
+    assert breaker.state == CircuitState.OPEN
+
+def test_trips_on_failure_rate():
+    breaker = make_breaker()
+    breaker.record(0.0, breaker.try_acquire(0.0), True)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record(0.0, breaker.try_acquire(0.0), True)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.retry_at == 5.0
+
+def test_trips_on_slow_calls():
+    breaker = make_breaker()
+    for _ in range(2):
+        breaker.record(0.0, breaker.try_acquire(0.0), False, latency=11.0)
+    assert breaker.state == CircuitState.OPEN
+
+def test_old_events_leave_the_window():
+    breaker = make_breaker()
+    breaker.record(0.0, breaker.try_acquire(0.0), True)
+    breaker.record(61.0, breaker.try_acquire(61.0), True)
+    assert breaker.state == CircuitState.CLOSED
+
+def test_open_rejects_until_retry_at():
+    breaker = make_breaker()
+    trip(breaker)
+
+    assert not breaker.is_available(4.9)
+    assert breaker.try_acquire(4.9) is None
+    assert breaker.state == CircuitState.OPEN
+
+    assert breaker.is_available(5.0)
+    assert breaker.try_acquire(5.0) is not None
+    assert breaker.state == CircuitState.HALF_OPEN
+
+def test_half_open_admits_a_single_probe():
+    breaker = make_breaker()
+    trip(breaker)
+
+    assert breaker.try_acquire(5.0) is not None
+    assert not breaker.is_available(5.0)
+    assert breaker.try_acquire(5.0) is None
+
+def test_probe_success_closes():
+    breaker = make_breaker()
+    trip(breaker)
+
+    breaker.record(6.0, breaker.try_acquire(5.0), False)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.trip_count == 0
+    assert breaker.try_acquire(6.0) is not None
+
+def test_probe_failure_reopens_with_longer_cooldown():
+    breaker = make_breaker()
+    trip(breaker)
+
+    breaker.record(6.0, breaker.try_acquire(5.0), True)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.retry_at == 16.0
+    assert breaker.try_acquire(15.0) is None
+
+def test_slow_probe_reopens():
+    breaker = make_breaker()
+    trip(breaker)
+
+    breaker.record(20.0, breaker.try_acquire(5.0), False, latency=15.0)
+    assert breaker.state == CircuitState.OPEN
+
+def test_cooldown_is_capped():
+    breaker = make_breaker(max_cooldown=8.0)
+    trip(breaker)
+
+    for now in (5.0, 15.0, 25.0):
+        breaker.record(now, breaker.try_acquire(now), True)
+    assert breaker.retry_at - 25.0 == 8.0
+
+def test_stuck_probe_is_replaced_after_timeout():
+    breaker = make_breaker()
+    trip(breaker)
+
+    assert breaker.try_acquire(5.0) is not None
+    assert breaker.try_acquire(34.9) is None
+    assert breaker.is_available(35.0)
+    assert breaker.try_acquire(35.0) is not None
+
+def test_results_from_before_a_trip_are_ignored():
+    breaker = make_breaker()
+    stale = [breaker.try_acquire(0.0) for _ in range(3)]
+    trip(breaker)
+
+    breaker.record(1.0, stale[0], True)
+    assert breaker.trip_count == 1
+    assert breaker.retry_at == 5.0
+
+    probe = breaker.try_acquire(5.0)
+    breaker.record(5.0, stale[1], False)
+    assert breaker.state == CircuitState.HALF_OPEN
+
+    breaker.record(6.0, probe, False)
+    breaker.record(6.0, stale[2], True)
+    breaker.record(6.0, stale[2], True)
+    assert breaker.state == CircuitState.CLOSED
+
+def test_registry_ignores_configured_statuses():
+    registry = CircuitBreakerRegistry(CircuitBreakerConfig(min_requests=1))
+
+    registry.record_failure('key', status_code=404)
+    assert registry.get_state('key') == CircuitState.CLOSED
+
+    registry.record_failure('key', status_code=500)
+    assert registry.get_state('key') == CircuitState.OPEN
+    assert not registry.is_available('key')
+    assert not registry.try_acquire('key')
+
+def test_registry_counts_untracked_calls_only_while_closed():
+    registry = CircuitBreakerRegistry(
+        CircuitBreakerConfig(min_requests=1, base_cooldown=0.0)
+    )
+    registry.record_failure('key')
+
+    async def probe():
+        assert registry.try_acquire('key')
+        assert registry.get_state('key') == CircuitState.HALF_OPEN
+
+    asyncio.run(probe())
+
+    registry.record_success('key')
+    assert registry.get_state('key') == CircuitState.HALF_OPEN
+
+def test_registry_tickets_follow_the_request():
+    registry = CircuitBreakerRegistry(
+        CircuitBreakerConfig(min_requests=1, base_cooldown=0.0)
+    )
+    registry.record_failure('key')
+
+    async def request():
+        assert registry.try_acquire('key')
+        await asyncio.create_task(attempt())
+
+    async def attempt():
+        registry.record_success('key')
+
+    asyncio.run(request())
+    assert registry.get_state('key') == CircuitState.CLOSED
+
+@pytest.mark.parametrize('status_code', [None, 500, 502])
+def test_registry_records_server_failures(status_code):
+    registry = CircuitBreakerRegistry(CircuitBreakerConfig(min_requests=1))
+    registry.record_failure('key', status_code=status_code)
+    assert registry.get_state('key') == CircuitState.OPEN